@@ -0,0 +1,102 @@
+"""
+Resized renditions of member profile pictures.
+
+Uploaded photos are often several megabytes but are shown in 60-150px
+circles. After an upload, square thumbnails are rendered in each of
+THUMBNAIL_SIZES as WebP and JPEG next to the original
+(profile_pics/thumbs/<file name>_<size>.<ext>, e.g. IMG_1.png_64.webp). The
+work runs on a background thread once the upload is committed, so the
+request does not wait for Pillow. Until the renditions exist, templates keep
+using the original.
+"""
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = (64, 128, 256)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+READY_CACHE_TIMEOUT = 60 * 60 * 24
+# Kept short: the cache is per process, and a worker that cached "not ready"
+# before the background thread finished would serve the original meanwhile.
+NOT_READY_CACHE_TIMEOUT = 10
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='profile-thumbnails')
+
+
+def thumbnail_name(picture_name, size, extension):
+    # The original's extension stays in the name: storage keeps IMG_1.jpg and
+    # IMG_1.png apart, so their thumbnails must not share IMG_1_<size>.
+    directory, filename = posixpath.split(picture_name)
+    return posixpath.join(directory, 'thumbs', f'{filename}_{size}.{extension}')
+
+
+def _ready_key(picture_name):
+    return f'profile-thumbnails:{picture_name}'
+
+
+def thumbnails_ready(picture_name):
+    """Whether the renditions of `picture_name` exist, cached to avoid a storage check per render."""
+    ready = cache.get(_ready_key(picture_name))
+    if ready is None:
+        ready = default_storage.exists(thumbnail_name(picture_name, THUMBNAIL_SIZES[-1], 'jpg'))
+        cache.set(_ready_key(picture_name), ready, READY_CACHE_TIMEOUT if ready else NOT_READY_CACHE_TIMEOUT)
+    return ready
+
+
+def generate_thumbnails(picture_name):
+    """Renders every size and format of `picture_name`. Returns the number of files written."""
+    with default_storage.open(picture_name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = image.convert('RGB')
+
+    written = 0
+    for size in THUMBNAIL_SIZES:
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for extension, (image_format, options) in THUMBNAIL_FORMATS.items():
+            buffer = BytesIO()
+            thumbnail.save(buffer, image_format, **options)
+            name = thumbnail_name(picture_name, size, extension)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+            written += 1
+
+    cache.set(_ready_key(picture_name), True, READY_CACHE_TIMEOUT)
+    return written
+
+
+def delete_thumbnails(picture_name):
+    for size in THUMBNAIL_SIZES:
+        for extension in THUMBNAIL_FORMATS:
+            default_storage.delete(thumbnail_name(picture_name, size, extension))
+    cache.delete(_ready_key(picture_name))
+
+
+def _process_upload(picture_name, previous_name):
+    try:
+        generate_thumbnails(picture_name)
+        if previous_name and previous_name != picture_name:
+            delete_thumbnails(previous_name)
+    except Exception:
+        logger.exception('Could not create thumbnails for %s', picture_name)
+
+
+def schedule_thumbnails(picture_name, previous_name=None):
+    """
+    Renders the thumbnails of a newly uploaded picture on a background thread
+    once the current transaction commits, and removes those of the picture it
+    replaced.
+    """
+    transaction.on_commit(lambda: _executor.submit(_process_upload, picture_name, previous_name))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from accounts.images import generate_thumbnails, thumbnails_ready
+from accounts.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Creates the resized thumbnails for profile pictures that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate thumbnails that already exist.')
+
+    def handle(self, *args, **options):
+        names = CustomUser.objects.exclude(profile_picture='').exclude(
+            profile_picture__isnull=True
+        ).values_list('profile_picture', flat=True).iterator()
+
+        created = failed = 0
+        for name in names:
+            if not options['force'] and thumbnails_ready(name):
+                continue
+            try:
+                generate_thumbnails(name)
+                created += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f'{name}: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Thumbnails created for {created} pictures ({failed} failed).'))
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:41
+
+import unicodedata
+
+from django.db import DatabaseError, migrations, models, transaction
+
+
+def normalize_search_text(value):
+    # A copy of accounts.models.normalize_search_text as of this migration.
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    without_accents = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(without_accents.lower().split())
+
+
+def populate_search_text(apps, schema_editor):
+    CustomUser = apps.get_model('accounts', 'CustomUser')
+    users = list(CustomUser.objects.only(
+        'first_name', 'middle_name', 'last_name', 'email', 'staff_id', 'phone_number'
+    ))
+    for user in users:
+        user.search_text = normalize_search_text(' '.join(filter(None, [
+            user.first_name, user.middle_name, user.last_name,
+            user.email, user.staff_id, user.phone_number,
+        ])))
+    CustomUser.objects.bulk_update(users, ['search_text'], batch_size=1000)
+
+
+def create_search_index(apps, schema_editor):
+    from accounts.search import install_search_index
+
+    # Older SQLite builds lack the trigram tokenizer and pg_trgm may need extra
+    # privileges; search then falls back to LIKE filters on search_text.
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            install_search_index(schema_editor.connection)
+    except DatabaseError:
+        pass
+
+
+def drop_search_index(apps, schema_editor):
+    from accounts.search import remove_search_index
+
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            remove_search_index(schema_editor.connection)
+    except DatabaseError:
+        pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_customuser_profile_picture'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(populate_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_search_text'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_superuser', False)), fields=['last_name', 'first_name'], name='user_active_name_idx'),
+        ),
+    ]
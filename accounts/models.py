@@ -1,6 +1,15 @@
+import unicodedata
+
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
+def normalize_search_text(value):
+    """Lower-cases, strips accents and collapses whitespace for search matching."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    without_accents = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(without_accents.lower().split())
+
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -80,12 +89,31 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
+    # Lower-cased, accent-free copy of the searchable fields, indexed per
+    # database backend (see accounts/search.py and migration 0003).
+    search_text = models.TextField(blank=True, default='', editable=False)
+
+    SEARCH_FIELDS = {'first_name', 'middle_name', 'last_name', 'email', 'staff_id', 'phone_number'}
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name','last_name']
 
     objects = CustomUserManager()
 
+    class Meta:
+        indexes = [
+            # Active-member listings and counts, ordered by name. Partial, because
+            # boolean filters compile to bare column tests that SQLite cannot
+            # match against the leading columns of a composite index.
+            models.Index(
+                fields=['last_name', 'first_name'], condition=models.Q(is_superuser=False, is_active=True),
+                name='user_active_name_idx',
+            ),
+            # Backends without partial index support (MySQL) skip the index above
+            # and order the member lists from this one.
+            models.Index(fields=['last_name', 'first_name'], name='user_name_idx'),
+        ]
+
     def get_full_name(self):
         """
         Return the first_name plus the last_name, with a space in between.
@@ -93,7 +121,22 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         full_name = f"{self.first_name} {self.last_name}"
         return full_name.strip()
 
+    def build_search_text(self):
+        """
+        Returns the normalized text used for member search: name parts, email,
+        staff ID and phone number.
+        """
+        return normalize_search_text(' '.join(filter(None, [
+            self.first_name, self.middle_name, self.last_name,
+            self.email, self.staff_id, self.phone_number,
+        ])))
+
     def save(self, *args, **kwargs):
+        self.search_text = self.build_search_text()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & self.SEARCH_FIELDS:
+            kwargs['update_fields'] = set(update_fields) | {'search_text'}
+
         # We need to save the instance first to get a primary key (pk)
         is_new = self.pk is None
         super().save(*args, **kwargs)
@@ -109,7 +152,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
             # Use .objects.filter().update() to save just this field and
             # avoid calling the save() method again, which would cause an infinite loop.
-            CustomUser.objects.filter(pk=self.pk).update(staff_id=self.staff_id)
+            self.search_text = self.build_search_text()
+            CustomUser.objects.filter(pk=self.pk).update(staff_id=self.staff_id, search_text=self.search_text)
 
     def __str__(self):
         return self.email
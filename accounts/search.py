@@ -0,0 +1,128 @@
+"""
+Member search shared by the finance, secretary and chairperson views.
+
+Every member row carries a normalized `search_text` column (name parts, email,
+staff ID and phone number). Each database backend gets the index that can
+serve substring searches on it:
+
+* PostgreSQL: a GIN trigram index, used by plain LIKE '%term%' filters.
+* SQLite (local runs): an FTS5 table with the trigram tokenizer, kept in sync
+  by triggers.
+* MySQL: a FULLTEXT index with the ngram parser.
+
+Terms too short for the backend's index fall back to a LIKE filter on the
+same column.
+"""
+from django.db import connections
+from django.db.models.expressions import RawSQL
+
+from .models import normalize_search_text
+
+USER_TABLE = 'accounts_customuser'
+TRIGRAM_INDEX = 'accounts_customuser_search_trgm'
+FULLTEXT_INDEX = 'accounts_customuser_search_ft'
+FTS_TABLE = 'accounts_customuser_fts'
+FTS_TRIGGERS = {
+    'accounts_customuser_fts_ai': (
+        f"AFTER INSERT ON {USER_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+    ),
+    'accounts_customuser_fts_ad': (
+        f"AFTER DELETE ON {USER_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END"
+    ),
+    'accounts_customuser_fts_au': (
+        f"AFTER UPDATE OF search_text ON {USER_TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+        f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+    ),
+}
+
+# Whether the SQLite FTS table and triggers exist, per database alias. Looked
+# up on the first search; installing or removing the index resets it.
+_fts_installed = {}
+
+
+def install_search_index(db_connection):
+    """
+    Creates the backend-specific search index. Safe to run again, e.g. after a
+    SQLite table rebuild dropped the FTS triggers.
+    """
+    _fts_installed.pop(db_connection.alias, None)
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON {USER_TABLE} '
+                'USING gin (search_text gin_trgm_ops)'
+            )
+        elif db_connection.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"search_text, content='{USER_TABLE}', content_rowid='id', tokenize='trigram')"
+            )
+            for name, body in FTS_TRIGGERS.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        elif db_connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT COUNT(*) FROM information_schema.statistics '
+                'WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s',
+                [USER_TABLE, FULLTEXT_INDEX],
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(
+                    f'ALTER TABLE {USER_TABLE} ADD FULLTEXT INDEX {FULLTEXT_INDEX} (search_text) WITH PARSER ngram'
+                )
+
+
+def remove_search_index(db_connection):
+    _fts_installed.pop(db_connection.alias, None)
+    with db_connection.cursor() as cursor:
+        if db_connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+        elif db_connection.vendor == 'sqlite':
+            for name in FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif db_connection.vendor == 'mysql':
+            cursor.execute(f'ALTER TABLE {USER_TABLE} DROP INDEX {FULLTEXT_INDEX}')
+
+
+def _sqlite_fts_installed(db_connection):
+    if db_connection.alias not in _fts_installed:
+        names = [FTS_TABLE, *FTS_TRIGGERS]
+        with db_connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})", names
+            )
+            _fts_installed[db_connection.alias] = cursor.fetchone()[0] == len(names)
+    return _fts_installed[db_connection.alias]
+
+
+def search_members(queryset, query):
+    """
+    Filters a CustomUser queryset to members matching every word of `query`
+    in their name, email, staff ID or phone number.
+    """
+    terms = normalize_search_text(query).split()
+    if not terms:
+        return queryset
+
+    db_connection = connections[queryset.db]
+    if db_connection.vendor == 'sqlite' and min(map(len, terms)) >= 3 and _sqlite_fts_installed(db_connection):
+        match = ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]
+        ))
+
+    if db_connection.vendor == 'mysql' and min(map(len, terms)) >= 2:
+        against = ' '.join('+"{}"'.format(term.replace('"', '')) for term in terms)
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT id FROM {USER_TABLE} WHERE MATCH(search_text) AGAINST (%s IN BOOLEAN MODE)', [against]
+        ))
+
+    # PostgreSQL serves these LIKE filters from the trigram index.
+    for term in terms:
+        queryset = queryset.filter(search_text__contains=term)
+    return queryset
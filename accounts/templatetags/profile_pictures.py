@@ -0,0 +1,44 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from accounts.images import THUMBNAIL_SIZES, thumbnail_name, thumbnails_ready
+
+register = template.Library()
+
+
+def _rendition_size(pixels):
+    """Smallest thumbnail at least `pixels` wide, or the largest one."""
+    return next((size for size in THUMBNAIL_SIZES if size >= pixels), THUMBNAIL_SIZES[-1])
+
+
+@register.inclusion_tag('accounts/profile_picture.html')
+def profile_picture(user, size, css_class='rounded-circle', alt=''):
+    """
+    Renders a member's profile picture for a `size` x `size` pixel slot,
+    serving the WebP/JPEG thumbnails that fit it (with a 2x variant for high
+    density screens) and falling back to the original upload until they exist.
+
+    Usage: {% profile_picture member 100 "rounded-circle me-3" %}
+    """
+    context = {
+        'size': size,
+        'css_class': css_class,
+        'alt': alt or user.get_full_name(),
+        'src': user.profile_picture.url,
+    }
+    name = user.profile_picture.name
+    if thumbnails_ready(name):
+        one_x, two_x = _rendition_size(size), _rendition_size(size * 2)
+
+        def srcset(extension):
+            urls = [default_storage.url(thumbnail_name(name, one_x, extension))]
+            if two_x != one_x:
+                urls = [f'{urls[0]} 1x', f'{default_storage.url(thumbnail_name(name, two_x, extension))} 2x']
+            return ', '.join(urls)
+
+        context.update({
+            'src': default_storage.url(thumbnail_name(name, one_x, 'jpg')),
+            'webp_srcset': srcset('webp'),
+            'jpg_srcset': srcset('jpg'),
+        })
+    return context
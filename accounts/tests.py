@@ -1,3 +1,108 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import time
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .images import NOT_READY_CACHE_TIMEOUT, thumbnail_name, thumbnails_ready
+from .models import CustomUser
+from .search import FTS_TABLE, search_members
 
 # Create your tests here.
+
+
+class ThumbnailNameTests(SimpleTestCase):
+
+    def test_name_keeps_the_original_extension(self):
+        self.assertEqual(thumbnail_name('profile_pics/IMG_1.jpg', 64, 'webp'), 'profile_pics/thumbs/IMG_1.jpg_64.webp')
+
+    def test_pictures_differing_only_by_extension_do_not_share_thumbnails(self):
+        names = {thumbnail_name(f'profile_pics/IMG_1.{ext}', 64, 'webp') for ext in ('jpg', 'png', 'JPG')}
+        self.assertEqual(len(names), 3)
+
+
+class ThumbnailsReadyTests(SimpleTestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def test_only_a_positive_result_is_cached_for_long(self):
+        picture = 'profile_pics/IMG_1.jpg'
+        self.assertFalse(thumbnails_ready(picture))
+        default_storage.save(thumbnail_name(picture, 256, 'jpg'), ContentFile(b'jpeg'))
+
+        later = time.time() + NOT_READY_CACHE_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertTrue(thumbnails_ready(picture))
+        default_storage.delete(thumbnail_name(picture, 256, 'jpg'))
+        self.assertTrue(thumbnails_ready(picture))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Exercises the SQLite FTS5 index.')
+class SearchMembersTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ama = CustomUser.objects.create_user(
+            email='ama@example.com', password='testing123', first_name='Ama', last_name='Ménsah', phone_number='0241234567',
+        )
+        cls.kofi = CustomUser.objects.create_user(
+            email='kofi@example.com', password='testing123', first_name='Kofi', last_name='Boateng', phone_number='0209999999',
+        )
+
+    def search(self, query):
+        return sorted(search_members(CustomUser.objects.all(), query).values_list('pk', flat=True))
+
+    def fts_rows(self, query):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [f'"{query}"'])
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_search_text_is_normalized(self):
+        self.ama.refresh_from_db()
+        self.assertEqual(self.ama.search_text, f'ama mensah ama@example.com {self.ama.staff_id.lower()} 0241234567')
+
+    def test_terms_use_the_fts_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search('MENSAH'), [self.ama.pk])
+        self.assertIn(FTS_TABLE, queries[-1]['sql'])
+        self.assertEqual(self.search('ama ménsah'), [self.ama.pk])
+        self.assertEqual(self.search('ama boateng'), [])
+        self.assertEqual(self.search('123 4567'), [self.ama.pk])
+        self.assertEqual(self.search(self.kofi.staff_id), [self.kofi.pk])
+        self.assertEqual(self.search('"kofi'), [])
+
+    def test_short_terms_fall_back_to_like(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search('ko'), [self.kofi.pk])
+        self.assertNotIn(FTS_TABLE, queries[-1]['sql'])
+        self.assertEqual(self.search('am mensah'), [self.ama.pk])
+
+    def test_index_check_runs_once_per_alias(self):
+        self.search('mensah')
+        with self.assertNumQueries(1):
+            self.search('boateng')
+
+    def test_writes_keep_the_index_in_sync(self):
+        self.ama.last_name = 'Owusu'
+        self.ama.save(update_fields=['last_name'])
+        self.assertEqual(self.search('owusu'), [self.ama.pk])
+        self.assertEqual(self.search('mensah'), [])
+
+        CustomUser.objects.filter(pk=self.kofi.pk).update(search_text='kofi annan')
+        self.assertEqual(self.fts_rows('annan'), [self.kofi.pk])
+        self.assertEqual(self.fts_rows('boateng'), [])
+
+        self.kofi.delete()
+        self.assertEqual(self.fts_rows('annan'), [])
@@ -0,0 +1,31 @@
+// Sends the "Dismiss all" announcement form in the background and removes the
+// announcements card, instead of reloading the whole dashboard.
+document.addEventListener('submit', function (event) {
+    var form = event.target;
+    if (!form.matches('[data-dismiss-announcements]')) {
+        return;
+    }
+    event.preventDefault();
+
+    fetch(form.action, {
+        method: 'POST',
+        body: new FormData(form),
+        headers: {'Accept': 'application/json'},
+        credentials: 'same-origin'
+    }).then(function (response) {
+        if (!response.ok) {
+            throw new Error(response.status);
+        }
+        return response.json();
+    }).then(function (data) {
+        var card = form.closest('[data-announcements]');
+        if (data.unread_count === 0 && card) {
+            card.remove();
+        } else {
+            window.location.reload();
+        }
+    }).catch(function () {
+        // Fall back to a normal submit, which redirects back to the dashboard.
+        form.submit();
+    });
+});
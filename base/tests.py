@@ -1,3 +1,69 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from finance.models import Dues
+from members.models import Benefit
+from secretary.models import Announcement
+from utils.instrumentation import QueryBudgetExceeded
 
 # Create your tests here.
+
+
+@override_settings(QUERY_BUDGET_RAISE=True, SERVER_TIMING_HEADER=True)
+class QueryBudgetTests(TestCase):
+    """
+    Renders the budgeted pages with several rows of everything, so a query per
+    row (an N+1) pushes them over their budget in settings.QUERY_BUDGETS.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(
+            email='chair@example.com', password='testing123', first_name='Kofi', last_name='Boateng', is_staff=True,
+        )
+        for index in range(5):
+            member = CustomUser.objects.create_user(
+                email=f'member{index}@example.com', password='testing123', first_name='Ama', last_name=f'Mensah{index}',
+            )
+            Dues.objects.create(member=member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 1 + index, 5))
+            Benefit.objects.create(member=member, benefit_type='Birth', detail='-')
+            Announcement.objects.create(title=f'Notice {index}', content='-', author=member)
+
+    def setUp(self):
+        # Start every test from a cold cache, so the budgets do not depend on
+        # what earlier tests cached under the same (reused) primary keys.
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_pages_within_budget(self):
+        urls = [
+            reverse('finance:finance_dashboard'),
+            reverse('finance:finance_report'),
+            reverse('finance:finance_members_list'),
+            reverse('finance:finance_member_detail', args=[self.user.pk]),
+            reverse('finance:manage_benefits'),
+            reverse('chairperson:chairperson_dashboard'),
+            reverse('chairperson:financial_report'),
+            reverse('chairperson:members_list'),
+            reverse('chairperson:manage_benefits'),
+            reverse('dashboard'),
+            reverse('fund_details'),
+            reverse('benefit_list'),
+            reverse('secretary_dashboard'),
+            reverse('members_list'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('db;dur=', response['Server-Timing'])
+
+    @override_settings(QUERY_BUDGETS={'finance:finance_report': 1})
+    def test_over_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('finance:finance_report'))
@@ -12,5 +12,8 @@ urlpatterns = [
     path('member/<int:pk>/detail/', views.memberDetailView, name='member_detail'),
     path('announcement/<int:pk>/dismiss/', views.dismissAnnouncementView, name='dismiss_announcement'),
     path('member/<int:pk>/statement/print/', views.chairpersonMemberStatementPrintView, name='member_statement_print'),
+    path('export/dues/', views.exportDuesView, name='export_dues'),
+    path('export/members/', views.exportMembersView, name='export_members'),
+    path('export/benefits/', views.exportBenefitsView, name='export_benefits'),
 
 ]
@@ -2,35 +2,31 @@ from decimal import Decimal
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Max, Value, Q, Count
-from django.db.models.functions import Concat, TruncMonth
+from django.db.models import Sum
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 
 from accounts.models import CustomUser
-from finance.models import Dues
+from accounts.search import search_members
+from finance.arrears import attach_arrears
+from finance.models import Dues, DuesCoverage, FundLedger
+from finance.reports import build_financial_report
 from members.models import Benefit
 from secretary.models import Announcement
+from utils.dashboard_cache import cached_dashboard_metrics, get_dashboard_version
+from utils.exports import benefits_export_response, dues_export_response, members_export_response, parse_export_year
 
 
-@login_required
-def chairDashboardView(request):
+def chairDashboardMetrics(today):
     """
-    Displays the main dashboard for the chairperson, providing a comprehensive
-    overview of the association's key metrics.
+    Computes the association-wide figures for the chairperson's dashboard.
+    The result is cached by the dashboard view, so querysets are evaluated here.
     """
-    today = timezone.now().date()
-
     # --- Financial Metrics ---
-    total_fund_balance = Dues.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    yearly_total_contributions = Dues.objects.filter(
-        payment_date__year=today.year
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    monthly_total_contributions = Dues.objects.filter(
-        payment_date__year=today.year,
-        payment_date__month=today.month
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    total_fund_balance = FundLedger.objects.total_balance()
+    yearly_total_contributions = FundLedger.objects.total_for_year(today.year)
+    monthly_total_contributions = FundLedger.objects.total_for_month(today.year, today.month)
 
     # --- Benefit Metrics ---
     honoured_benefits = Benefit.objects.filter(honoured=True)
@@ -42,34 +38,41 @@ def chairDashboardView(request):
 
     # --- Member Metrics ---
     total_members = CustomUser.objects.filter(is_superuser=False, is_active=True).count()
-    current_month_year = today.strftime('%B %Y')
-    paid_this_month_ids = Dues.objects.filter(
-        payment_date__year=today.year,
-        payment_date__month=today.month
-    ).values_list('member_id', flat=True).distinct()
-    outstanding_members = CustomUser.objects.filter(
-        is_superuser=False, is_active=True
-    ).exclude(
-        pk__in=paid_this_month_ids
-    ).order_by('last_name', 'first_name')
+    outstanding_members = list(DuesCoverage.objects.outstanding_members(
+        today.year, today.month
+    ).order_by('last_name', 'first_name'))
 
     # --- Actionable Items ---
-    pending_benefits = Benefit.objects.filter(status='Pending').select_related('member').order_by('-pk')
-    unread_announcements = Announcement.objects.exclude(read_by=request.user)
+    pending_benefits = list(Benefit.objects.filter(status='Pending').select_related('member').order_by('-date_submitted'))
 
-    context = {
-        'navbar': True,
+    return {
         'total_fund_balance': total_fund_balance,
         'total_members': total_members,
         'yearly_total_contributions': yearly_total_contributions,
         'monthly_total_contributions': monthly_total_contributions,
         'outstanding_members': outstanding_members,
-        'current_month_year': current_month_year,
+        'current_month_year': today.strftime('%B %Y'),
         'pending_benefits': pending_benefits,
         'total_benefit_amount': total_benefit_amount,
         'honoured_benefits_count': honoured_benefits_count,
         'benefited_members_count': benefited_members_count,
         'balance_after_benefits': balance_after_benefits,
+    }
+
+
+@login_required
+def chairDashboardView(request):
+    """
+    Displays the main dashboard for the chairperson, providing a comprehensive
+    overview of the association's key metrics.
+    """
+    # Association-wide figures are shared by every chairperson and cached.
+    context = cached_dashboard_metrics('chair', chairDashboardMetrics)
+    unread_announcements = Announcement.objects.unread_by(request.user).select_related('author')
+
+    context = {
+        'navbar': True,
+        **context,
         'unread_announcements': unread_announcements,
     }
     return render(request, 'chair/dashboard.html', context)
@@ -84,15 +87,11 @@ def membersListView(request):
     members_list = CustomUser.objects.filter(is_superuser=False, is_active=True).order_by('first_name', 'last_name')
 
     if query:
-        members_list = members_list.filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(staff_id__icontains=query)
-        ).distinct()
+        members_list = search_members(members_list, query)
 
     context = {
         'navbar': True,
-        'members_list': members_list,
+        'members_list': attach_arrears(members_list),
     }
     return render(request, 'chair/members_list.html', context)
 
@@ -183,7 +182,7 @@ def dismissAnnouncementView(request, pk):
     Marks an announcement as read by the current user.
     """
     announcement = get_object_or_404(Announcement, pk=pk)
-    announcement.read_by.add(request.user)
+    Announcement.objects.dismiss(request.user, announcement)
     return redirect('chairperson:chairperson_dashboard')
 
 
@@ -199,60 +198,33 @@ def financialReportView(request):
     except (ValueError, TypeError):
         selected_year = today.year
 
-    payment_dates = Dues.objects.dates('payment_date', 'year', order='DESC')
-    available_years = [date.year for date in payment_dates]
-    # Ensure the selected year is in the list, especially for the current year
-    # if no payments have been made yet.
-    if selected_year not in available_years:
-        available_years.append(selected_year)
-        available_years.sort(reverse=True)
-
-    dues_for_year = Dues.objects.filter(payment_date__year=selected_year)
-
-    total_fund_balance = Dues.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    yearly_total_contributions = dues_for_year.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    context = {
+        'navbar': True,
+        **build_financial_report(selected_year),
+        'data_version': get_dashboard_version(),
+    }
+    return render(request, 'chair/financial_report.html', context)
 
-    total_members = CustomUser.objects.filter(is_superuser=False, is_active=True).count()
-    average_contribution = (yearly_total_contributions / total_members) if total_members > 0 else Decimal('0.00')
 
-    monthly_breakdown = dues_for_year.annotate(
-        month=TruncMonth('payment_date')
-    ).values('month').annotate(total=Sum('amount')).order_by('month')
+@login_required
+def exportDuesView(request):
+    """
+    Streams the dues ledger as CSV, optionally filtered by ?year=.
+    """
+    return dues_export_response(parse_export_year(request))
 
-    top_contributors = dues_for_year.values(
-        'member__id',
-    ).annotate(
-        full_name=Concat('member__first_name', Value(' '), 'member__last_name'),
-        total_paid=Sum('amount')
-    ).order_by('-total_paid')[:10]
 
-    # --- Benefit Metrics ---
-    benefits_for_year = Benefit.objects.filter(date_submitted__year=selected_year)
-    total_benefits = benefits_for_year.count()
-    pending_benefits = benefits_for_year.filter(status='Pending').count()
-    approved_benefits = benefits_for_year.filter(status='Approved').count()
-    denied_benefits = benefits_for_year.filter(status='Denied').count()
-    honoured_benefits = benefits_for_year.filter(honoured=True).count()
-    total_amount_honoured = benefits_for_year.filter(honoured=True).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    balance_after_benefits = total_fund_balance - total_amount_honoured
+@login_required
+def exportMembersView(request):
+    """
+    Streams the member roster as CSV.
+    """
+    return members_export_response()
 
 
-    context = {
-        'navbar': True,
-        'selected_year': selected_year,
-        'available_years': available_years,
-        'total_fund_balance': total_fund_balance,
-        'yearly_total_contributions': yearly_total_contributions,
-        'total_members': total_members,
-        'average_contribution': average_contribution,
-        'monthly_breakdown': monthly_breakdown,
-        'top_contributors': top_contributors,
-        'total_benefits': total_benefits,
-        'pending_benefits': pending_benefits,
-        'approved_benefits': approved_benefits,
-        'denied_benefits': denied_benefits,
-        'honoured_benefits': honoured_benefits,
-        'total_amount_honoured': total_amount_honoured,
-        'balance_after_benefits': balance_after_benefits,
-    }
-    return render(request, 'chair/financial_report.html', context)
+@login_required
+def exportBenefitsView(request):
+    """
+    Streams benefit claims as CSV, optionally filtered by ?year=.
+    """
+    return benefits_export_response(parse_export_year(request))
@@ -0,0 +1,119 @@
+"""
+Arrears: how far each member's dues are behind.
+
+A member owes one month's dues (MAX_MONTHLY_PAYMENT) for every month from
+the month they joined up to the current one. A month counts as covered once
+its DuesCoverage total reaches the full monthly amount. Payments carried
+over into future months count towards the balance but not towards the
+months covered so far.
+
+The figures come from one read of the members' DuesCoverage rows, folded
+into per-member totals in a single pass, so a whole page or list of members
+costs the same single query as one member. Each member's result is cached
+under the dashboard data version, so any dues write makes the next read
+recompute it.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from utils.dashboard_cache import DASHBOARD_CACHE_TIMEOUT, get_dashboard_version
+from .models import DuesCoverage
+from .services import MAX_MONTHLY_PAYMENT
+
+# Members per query when computing many members at once.
+ARREARS_CHUNK_SIZE = 2000
+
+MemberArrears = namedtuple('MemberArrears', [
+    'months_owed',     # months from joining up to and including the current one
+    'months_covered',  # months in that span paid in full
+    'months_behind',   # months owed but not paid in full
+    'total_paid',      # everything paid, including months paid in advance
+    'balance',         # total_paid less the dues owed so far; negative when behind
+])
+
+
+def month_index(date):
+    """Months since year 0, so month spans can be compared and subtracted."""
+    return date.year * 12 + date.month
+
+
+def build_arrears(joined_month, current_month, total_paid, months_covered, monthly_amount=MAX_MONTHLY_PAYMENT):
+    """Derives a MemberArrears from the month indexes and coverage totals."""
+    months_owed = max(current_month - joined_month + 1, 0)
+    return MemberArrears(
+        months_owed=months_owed,
+        months_covered=months_covered,
+        months_behind=max(months_owed - months_covered, 0),
+        total_paid=total_paid,
+        balance=total_paid - months_owed * monthly_amount,
+    )
+
+
+def joined_month_index(member_or_date_joined):
+    date_joined = getattr(member_or_date_joined, 'date_joined', member_or_date_joined)
+    if timezone.is_aware(date_joined):
+        date_joined = timezone.localtime(date_joined)
+    return month_index(date_joined)
+
+
+def compute_arrears(members, today=None, monthly_amount=MAX_MONTHLY_PAYMENT):
+    """
+    Returns {member_id: MemberArrears} for the given CustomUser objects,
+    bypassing the cache. Each chunk of members costs one query for their
+    DuesCoverage rows, which are folded into totals in one pass.
+    """
+    current_month = month_index(today or timezone.localdate())
+
+    members = list(members)
+    results = {}
+    for start in range(0, len(members), ARREARS_CHUNK_SIZE):
+        chunk = members[start:start + ARREARS_CHUNK_SIZE]
+        joined_months = {member.pk: joined_month_index(member) for member in chunk}
+        total_paid = {pk: Decimal('0.00') for pk in joined_months}
+        months_covered = {pk: 0 for pk in joined_months}
+
+        coverage = DuesCoverage.objects.filter(member_id__in=joined_months).values_list('member_id', 'year', 'month', 'total_amount')
+        for member_id, year, month, amount in coverage:
+            total_paid[member_id] += amount
+            if amount >= monthly_amount and joined_months[member_id] <= year * 12 + month <= current_month:
+                months_covered[member_id] += 1
+
+        for pk, joined_month in joined_months.items():
+            results[pk] = build_arrears(joined_month, current_month, total_paid[pk], months_covered[pk], monthly_amount)
+    return results
+
+
+def _cache_key(member_id, today, version):
+    return f"arrears:{member_id}:{today.isoformat()}:v{version}"
+
+
+def cached_arrears(members):
+    """
+    Returns {member_id: MemberArrears} for the given CustomUser objects,
+    reading the cache in one round trip and computing only the members that
+    were missing.
+    """
+    today = timezone.localdate()
+    version = get_dashboard_version()
+    keys = {member.pk: _cache_key(member.pk, today, version) for member in members}
+    cached = cache.get_many(keys.values())
+
+    results = {member_id: cached[key] for member_id, key in keys.items() if key in cached}
+    missing = [member for member in members if member.pk not in results]
+    if missing:
+        computed = compute_arrears(missing, today)
+        cache.set_many({keys[member_id]: value for member_id, value in computed.items()}, DASHBOARD_CACHE_TIMEOUT)
+        results.update(computed)
+    return results
+
+
+def attach_arrears(members):
+    """Sets `.arrears` on each member in `members` and returns them as a list."""
+    members = list(members)
+    arrears = cached_arrears(members)
+    for member in members:
+        member.arrears = arrears.get(member.pk)
+    return members
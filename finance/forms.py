@@ -1,6 +1,8 @@
 from django import forms
 from .models import Dues
 from members.models import Benefit
+from utils.storage import MaxFileSizeValidator
+from utils.uploads import file_upload_max_size
 
 
 class DuesPaymentForm(forms.ModelForm):
@@ -26,4 +28,21 @@ class HonourBenefitForm(forms.ModelForm):
         }
         labels = {
             'amount': 'Honour Amount (GH₵)'
-        }
\ No newline at end of file
+        }
+
+class DuesImportForm(forms.Form):
+    """
+    A form for uploading a CSV file of dues payments for bulk import.
+    """
+    csv_file = forms.FileField(
+        label='Payments CSV',
+        widget=forms.FileInput(attrs={'class': 'form-control', 'accept': '.csv'}),
+        help_text='Columns: staff_id or phone_number, amount, payment_date (YYYY-MM-DD or DD/MM/YYYY), notes (optional).',
+        validators=[MaxFileSizeValidator(limit=file_upload_max_size())],
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        initial=True,
+        label='Dry run (validate only, do not save)',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
@@ -0,0 +1,160 @@
+import json
+import logging
+import re
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from finance.models import Dues
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000}
+RENDER_TIMING = re.compile(r'render;dur=([\d.]+)')
+
+
+class Command(BaseCommand):
+    help = (
+            'Seeds a throwaway database at a chosen scale, times every role dashboard, report, '
+            'list, search and statement page, and writes the results as JSON for comparison across commits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='1k', help='Number of members to seed.')
+        parser.add_argument('--members', type=int, help='Exact number of members, overriding --scale.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per page after the cold one.')
+        parser.add_argument('--output', default='benchmark-results.json', help='Where to write the JSON results.')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the benchmark database and reuse its data on the next run.')
+
+    def handle(self, *args, **options):
+        members = options['members'] or SCALES[options['scale']]
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+
+        # Everything runs against a separate test database, never the real one.
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            if not (options['keepdb'] and CustomUser.objects.filter(is_superuser=False).count() == members):
+                self.seed(members)
+            results = self.run_benchmarks(options['repeat'])
+        finally:
+            if not options['keepdb']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'commit': self.current_commit(),
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'members': members,
+            'repeat': options['repeat'],
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results for {members} members written to {options['output']}."))
+
+    def seed(self, members):
+        self.stdout.write(f'Seeding {members} members...')
+        call_command('seed_data', members=members, stdout=self.stdout)
+
+    def pages(self, member, query):
+        return [
+            ('finance_dashboard', reverse('finance:finance_dashboard')),
+            ('chair_dashboard', reverse('chairperson:chairperson_dashboard')),
+            ('member_dashboard', reverse('dashboard')),
+            ('secretary_dashboard', reverse('secretary_dashboard')),
+            ('finance_report', reverse('finance:finance_report')),
+            ('chair_report', reverse('chairperson:financial_report')),
+            ('finance_members_list', reverse('finance:finance_members_list')),
+            ('chair_members_list', reverse('chairperson:members_list')),
+            ('secretary_members_list', reverse('members_list')),
+            ('finance_benefits', reverse('finance:manage_benefits')),
+            ('chair_benefits', reverse('chairperson:manage_benefits')),
+            ('member_benefits', reverse('benefit_list')),
+            ('member_fund_details', reverse('fund_details')),
+            ('finance_members_search', f"{reverse('finance:finance_members_list')}?q={query}"),
+            ('chair_members_search', f"{reverse('chairperson:members_list')}?q={query}"),
+            ('secretary_members_search', f"{reverse('members_list')}?q={query}"),
+            ('finance_member_detail', reverse('finance:finance_member_detail', args=[member.pk])),
+            ('finance_statement_print', reverse('finance:finance_member_statement_print', args=[member.pk])),
+            ('chair_member_detail', reverse('chairperson:member_detail', args=[member.pk])),
+            ('chair_statement_print', reverse('chairperson:member_statement_print', args=[member.pk])),
+            ('secretary_member_detail', reverse('member_detail', args=[member.pk])),
+        ]
+
+    def run_benchmarks(self, repeat):
+        dues = Dues.objects.order_by('member_id').select_related('member').first()
+        if dues is None:
+            raise CommandError(
+                'The benchmark database has no dues to time pages against. '
+                'Seed more members, or run again without --keepdb to reseed it.'
+            )
+        member = dues.member
+        client = Client()
+        client.force_login(member)
+
+        # The per-request log lines would drown the summary; budget warnings still show.
+        performance_logger = logging.getLogger('twa.performance')
+        previous_level = performance_logger.level
+        performance_logger.setLevel(logging.WARNING)
+
+        results = []
+        try:
+            # Rendering time is read back from the Server-Timing header.
+            with override_settings(SERVER_TIMING_HEADER=True):
+                for name, url in self.pages(member, member.last_name[:4]):
+                    results.append(self.time_page(client, name, url, repeat))
+        finally:
+            performance_logger.setLevel(previous_level)
+        return results
+
+    def time_page(self, client, name, url, repeat):
+        """Times one cold request (empty cache) and `repeat` warm ones."""
+        cache.clear()
+        timings, render_timings, query_counts = [], [], []
+        for _ in range(repeat + 1):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            query_counts.append(len(queries))
+            render = RENDER_TIMING.search(response.get('Server-Timing', ''))
+            render_timings.append(float(render.group(1)) if render else 0.0)
+        cold, warm = timings[0], timings[1:]
+        self.stdout.write(
+            f'{name:<28} {statistics.median(warm):9.1f} ms  '
+            f'{statistics.median(render_timings[1:]):7.1f} ms render  {query_counts[-1]:3d} queries'
+        )
+        return {
+            'name': name,
+            'url': url,
+            'status': response.status_code,
+            'cold_queries': query_counts[0],
+            'queries': query_counts[-1],
+            'cold_ms': round(cold, 2),
+            'median_ms': round(statistics.median(warm), 2),
+            'min_ms': round(min(warm), 2),
+            'max_ms': round(max(warm), 2),
+            'cold_render_ms': render_timings[0],
+            'median_render_ms': round(statistics.median(render_timings[1:]), 2),
+        }
+
+    def current_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
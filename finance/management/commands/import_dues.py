@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.services import import_payments, read_import_file
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports dues payments from a bank or mobile-money CSV file. The file needs '
+        'a header row with staff_id or phone_number, amount, payment_date and optionally notes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the CSV file of payments.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file and report what would be imported without saving anything.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of dues records written per batch.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_file'], 'rb') as csv_file:
+                rows = read_import_file(csv_file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Could not read {options['csv_file']}: {error}")
+
+        result = import_payments(rows, dry_run=options['dry_run'], batch_size=options['batch_size'])
+
+        for line_number, reason in result.rejected:
+            self.stdout.write(self.style.WARNING(f'Line {line_number}: {reason}'))
+
+        for batch_number, dues_written, seconds in result.batches:
+            rate = dues_written / seconds if seconds else dues_written
+            self.stdout.write(f'Batch {batch_number}: {dues_written} dues records in {seconds:.2f}s ({rate:,.0f} records/s)')
+
+        summary = (
+            f'{result.rows_read} rows read, {result.rows_accepted} accepted, '
+            f'{len(result.rejected)} rejected. GH₵ {result.amount_total:,.2f} '
+        )
+        if result.dry_run:
+            self.stdout.write(self.style.SUCCESS(f'Dry run: {summary}would be spread into {result.dues_created} dues records.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{summary}recorded as {result.dues_created} dues records.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from finance.models import DuesCoverage
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-member monthly dues coverage table from the Dues table.'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding dues coverage from dues payments...')
+        rows = DuesCoverage.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Dues coverage rebuilt with {rows} member-month entries.'))
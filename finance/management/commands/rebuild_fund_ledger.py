@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from finance.models import FundLedger
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the monthly fund ledger summary from the Dues table.'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding fund ledger from dues payments...')
+        months = FundLedger.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Fund ledger rebuilt with {months} monthly entries. '
+            f'Total fund balance: {FundLedger.objects.total_balance():,.2f}'
+        ))
@@ -1,83 +1,230 @@
+import datetime
+import multiprocessing
 import random
-import uuid
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from decimal import Decimal
-from django.db import transaction
+from django.db import connection, transaction
 from faker import Faker
 
 # Assuming your Dues model is in the 'finance' app
-from finance.models import Dues
+from finance.models import Dues, DuesCoverage, FundLedger
+from members.models import Benefit, Children, Spouse
+from secretary.models import Announcement, AnnouncementDismissal, AnnouncementReadState
 
 User = get_user_model()
 
+SEED_PASSWORD = 'testing123'
+BENEFIT_STATUSES = ['Pending', 'Approved', 'Denied']
+
+
+def generate_members(args):
+    """
+    Builds plain field values for members `start` to `start + count - 1`,
+    together with their dues, family and benefit requests.
+
+    Runs in a worker process when --workers is above 1, so it only returns
+    picklable data and never touches the database. Each batch seeds its own
+    Faker and random generator, which keeps forked workers from producing
+    the same people.
+    """
+    start, count, seed = args
+    # The 'en_GH' locale is not standard in the Faker library, causing an error.
+    # We'll use 'en_GB' (Great Britain) as a close alternative.
+    # For truly localized Ghanaian data, a custom provider would be needed.
+    fake = Faker('en_GB')
+    fake.seed_instance(seed + start)
+    rng = random.Random(seed + start)
+    today = datetime.date.today()
+
+    members = []
+    for index in range(start, start + count):
+        first_name, last_name = fake.first_name(), fake.last_name()
+        member = {
+            'fields': {
+                'first_name': first_name,
+                'last_name': last_name,
+                # Numbered rather than drawn with fake.unique, which cannot stay
+                # unique across worker processes and runs out at large scales.
+                'email': f'{first_name}.{last_name}.{index}@example.com'.lower(),
+                'staff_id': f'ST-{index:06d}',
+                'phone_number': fake.numerify(text='0#########'),
+                'date_joined': fake.date_time_this_decade(tzinfo=datetime.timezone.utc),
+                'last_login': fake.date_time_this_month(tzinfo=datetime.timezone.utc),
+            },
+            # Each member will have between 5 and 20 payments of 5.00 or 10.00,
+            # in line with the application's monthly limit of 10.00.
+            'dues': [
+                (
+                    today - datetime.timedelta(days=rng.randint(0, 3 * 365)),
+                    rng.choice(['5.00', '10.00']),
+                    fake.sentence() if rng.random() < 0.5 else '',
+                )
+                for _ in range(rng.randint(5, 20))
+            ],
+            'spouse': None,
+            'children': [],
+            'benefits': [],
+        }
+        if rng.random() < 0.6:
+            member['spouse'] = {
+                'first_name': fake.first_name(),
+                'last_name': last_name,
+                'phone_number': fake.numerify(text='0#########'),
+            }
+        member['children'] = [
+            {'first_name': fake.first_name(), 'last_name': last_name}
+            for _ in range(rng.choice([0, 0, 1, 2, 3]))
+        ]
+        if rng.random() < 0.2:
+            benefit_type = rng.choice(list(Benefit.BENEFIT_AMOUNTS))
+            status = rng.choice(BENEFIT_STATUSES)
+            member['benefits'].append({
+                'benefit_type': benefit_type,
+                'detail': fake.sentence(),
+                'status': status,
+                'honoured': status == 'Approved' and rng.random() < 0.7,
+                'amount': Benefit.BENEFIT_AMOUNTS[benefit_type] if status == 'Approved' else None,
+                'date_submitted': fake.date_time_between(start_date='-3y', tzinfo=datetime.timezone.utc),
+            })
+        members.append(member)
+    return members
+
+
 class Command(BaseCommand):
     help = 'Populates the database with fake data for testing.'
 
     def add_arguments(self, parser):
         parser.add_argument('--members', type=int, help='The number of members to create.', default=25)
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Members generated and inserted per batch; bounds memory use at large scales.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes used to generate the fake data. Inserts always run in this process.',
+        )
+        parser.add_argument('--announcements', type=int, default=30, help='The number of announcements to create.')
 
     @transaction.atomic
     def handle(self, *args, **options):
         self.stdout.write('Deleting old data...')
         # Be careful with deleting users. This deletes all non-superusers.
         # Adjust if you have other staff/special users to preserve.
+        # Dues go first without their per-row delete signals, which would
+        # update the ledger once per payment; the summaries are rebuilt below.
+        dues = Dues.objects.all()
+        dues._raw_delete(dues.db)
         User.objects.filter(is_superuser=False).delete()
-        Dues.objects.all().delete()
 
-        # The 'en_GH' locale is not standard in the Faker library, causing an error.
-        # We'll use 'en_GB' (Great Britain) as a close alternative.
-        # For truly localized Ghanaian data, a custom provider would be needed.
-        fake = Faker('en_GB')
         num_members = options['members']
+        batch_size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+        seed = random.randrange(2 ** 32)
+        # Hashing is deliberately slow, so hash the shared password once.
+        password = make_password(SEED_PASSWORD)
+        batches = [(start, min(batch_size, num_members - start), seed) for start in range(0, num_members, batch_size)]
+
+        self.stdout.write(f'Creating {num_members} new members in batches of {batch_size}...')
+        totals = {'dues': 0, 'spouses': 0, 'children': 0, 'benefits': 0}
+        # Workers are forked so they can use the already-configured Django
+        # setup; platforms without fork generate in this process instead.
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                for generated in pool.imap(generate_members, batches):
+                    self.insert_batch(generated, password, batch_size, totals)
+        else:
+            for batch in batches:
+                self.insert_batch(generate_members(batch), password, batch_size, totals)
+
+        self.stdout.write('Members created. Now creating announcements...')
+        self.create_announcements(options['announcements'], batch_size)
+
+        # bulk_create skips the signals that maintain the summaries, so rebuild them once.
+        FundLedger.objects.rebuild()
+        DuesCoverage.objects.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully populated the database with {num_members} members, {totals['dues']} dues payments, "
+            f"{totals['spouses']} spouses, {totals['children']} children, {totals['benefits']} benefit requests "
+            f"and {options['announcements']} announcements."
+        ))
+
+    def insert_batch(self, generated, password, batch_size, totals):
         members = []
+        for data in generated:
+            member = User(password=password, **data['fields'])
+            # bulk_create skips save(), which normally fills the search column.
+            member.search_text = member.build_search_text()
+            members.append(member)
+        User.objects.bulk_create(members, batch_size=batch_size)
+
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL does not hand back the new primary keys.
+            pks = dict(User.objects.filter(
+                staff_id__in=[member.staff_id for member in members]
+            ).values_list('staff_id', 'pk'))
+            for member in members:
+                member.pk = pks[member.staff_id]
 
-        self.stdout.write(f'Creating {num_members} new members...')
-        for _ in range(num_members):
-            member = User(
-                first_name=fake.first_name(),
-                last_name=fake.last_name(),
-                # The CustomUser model uses email as the username.
-                # Using fake.unique.email() prevents IntegrityError on duplicate emails.
-                email=fake.unique.email(),
-                # NOTE: Assuming your custom User model has these fields.
-                # If not, you may need to adjust this part.
-                staff_id=fake.unique.numerify(text='ST-####'),
-                phone_number=fake.phone_number(),
-                date_joined=fake.date_time_this_decade(tzinfo=None),
-                last_login=fake.date_time_this_month(tzinfo=None)
+        dues, spouses, children, benefits = [], [], [], []
+        for member, data in zip(members, generated):
+            dues.extend(
+                Dues(member=member, payment_date=payment_date, amount=Decimal(amount), notes=notes)
+                for payment_date, amount, notes in data['dues']
             )
-            member.set_password('testing123')
-            members.append(member)
+            if data['spouse']:
+                spouses.append(Spouse(member=member, **data['spouse']))
+            children.extend(Children(member=member, **child) for child in data['children'])
+            benefits.extend(Benefit(member=member, **benefit) for benefit in data['benefits'])
 
-        User.objects.bulk_create(members)
-        self.stdout.write('Members created. Now creating dues payments...')
-
-        # Refresh members from DB to get their PKs
-        all_members = User.objects.filter(is_superuser=False)
-        dues_to_create = []
-        for member in all_members:
-            # Each member will have between 5 and 20 payments
-            for _ in range(random.randint(5, 20)):
-                payment_date = fake.date_between(start_date='-3y', end_date='today')
-                # Since bulk_create bypasses the model's save() method, we generate
-                # the receipt_number here, matching the logic in the Dues model.
-                date_str = payment_date.strftime('%Y%m%d')
-                unique_id_part = str(uuid.uuid4()).split('-')[0].upper()
-                receipt_number = f"RCPT-{date_str}-{unique_id_part}"
-                due = Dues(
-                    member=member,
-                    payment_date=payment_date,
-                    # This was creating single large payments. Let's create more realistic
-                    # smaller payments that align with the application's monthly limit of 10.00.
-                    amount=Decimal(random.choice(['5.00', '10.00'])),
-                    receipt_number=receipt_number,
-                    notes=fake.sentence() if random.choice([True, False]) else ''
-                )
-                dues_to_create.append(due)
+        # Since bulk_create bypasses the model's save() method, reserve the
+        # batch's receipt numbers here as a single block from the receipt sequence.
+        receipt_numbers = Dues.allocate_receipt_numbers(due.payment_date for due in dues)
+        for due, receipt_number in zip(dues, receipt_numbers):
+            due.receipt_number = receipt_number
 
-        Dues.objects.bulk_create(dues_to_create)
+        Dues.objects.bulk_create(dues, batch_size=batch_size)
+        Spouse.objects.bulk_create(spouses, batch_size=batch_size)
+        Children.objects.bulk_create(children, batch_size=batch_size)
+        Benefit.objects.bulk_create(benefits, batch_size=batch_size)
 
-        self.stdout.write(self.style.SUCCESS(
-            f'Successfully populated the database with {num_members} members and {len(dues_to_create)} dues payments.'
-        ))
\ No newline at end of file
+        totals['dues'] += len(dues)
+        totals['spouses'] += len(spouses)
+        totals['children'] += len(children)
+        totals['benefits'] += len(benefits)
+        self.stdout.write(f'  {len(members)} members and {len(dues)} dues payments inserted.')
+
+    def create_announcements(self, count, batch_size):
+        """
+        Creates `count` announcements and gives about half of the members a
+        read watermark partway through them, some with a newer one dismissed.
+        """
+        author = User.objects.filter(is_superuser=False).order_by('pk').first()
+        if author is None or count <= 0:
+            return
+        fake = Faker('en_GB')
+        announcements = Announcement.objects.bulk_create([
+            Announcement(title=fake.sentence(nb_words=6), content=fake.paragraph(nb_sentences=4), author=author)
+            for _ in range(count)
+        ])
+        if not connection.features.can_return_rows_from_bulk_insert:
+            announcements = list(Announcement.objects.order_by('-pk')[:count])
+        announcement_ids = sorted(announcement.pk for announcement in announcements)
+
+        member_ids = User.objects.filter(is_superuser=False).values_list('pk', flat=True)
+        read_states, dismissals = [], []
+        for member_id in member_ids.iterator(chunk_size=batch_size):
+            if random.random() < 0.5:
+                continue
+            position = random.randrange(len(announcement_ids))
+            read_states.append(AnnouncementReadState(user_id=member_id, read_through=announcement_ids[position]))
+            if position + 1 < len(announcement_ids) and random.random() < 0.3:
+                dismissals.append(AnnouncementDismissal(user_id=member_id, announcement_id=announcement_ids[position + 1]))
+            if len(read_states) >= batch_size:
+                AnnouncementReadState.objects.bulk_create(read_states)
+                AnnouncementDismissal.objects.bulk_create(dismissals)
+                read_states, dismissals = [], []
+        AnnouncementReadState.objects.bulk_create(read_states)
+        AnnouncementDismissal.objects.bulk_create(dismissals)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:31
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def populate_fund_ledger(apps, schema_editor):
+    Dues = apps.get_model('finance', 'Dues')
+    FundLedger = apps.get_model('finance', 'FundLedger')
+
+    monthly_totals = {}
+    for payment_date, amount in Dues.objects.values_list('payment_date', 'amount').iterator():
+        key = (payment_date.year, payment_date.month)
+        total, count = monthly_totals.get(key, (Decimal('0.00'), 0))
+        monthly_totals[key] = (total + amount, count + 1)
+
+    FundLedger.objects.bulk_create([
+        FundLedger(year=year, month=month, total_amount=total, payment_count=count)
+        for (year, month), (total, count) in monthly_totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FundLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Fund Ledger Entry',
+                'verbose_name_plural': 'Fund Ledger',
+                'ordering': ['-year', '-month'],
+                'constraints': [models.UniqueConstraint(fields=('year', 'month'), name='unique_fund_ledger_month')],
+            },
+        ),
+        migrations.RunPython(populate_fund_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+def create_dues_sequence(apps, schema_editor):
+    # Create the counter row up front so the first payments never race to insert it.
+    ReceiptSequence = apps.get_model('finance', 'ReceiptSequence')
+    ReceiptSequence.objects.get_or_create(name='dues')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_fundledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_dues_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:34
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_dues_coverage(apps, schema_editor):
+    Dues = apps.get_model('finance', 'Dues')
+    DuesCoverage = apps.get_model('finance', 'DuesCoverage')
+
+    cells = {}
+    for member_id, payment_date, amount in Dues.objects.values_list('member_id', 'payment_date', 'amount').iterator():
+        key = (member_id, payment_date.year, payment_date.month)
+        total, count, last_date = cells.get(key, (Decimal('0.00'), 0, payment_date))
+        cells[key] = (total + amount, count + 1, max(last_date, payment_date))
+
+    DuesCoverage.objects.bulk_create([
+        DuesCoverage(
+            member_id=member_id, year=year, month=month,
+            total_amount=total, payment_count=count, last_payment_date=last_date,
+        )
+        for (member_id, year, month), (total, count, last_date) in cells.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_receiptsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuesCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10)),
+                ('payment_count', models.PositiveIntegerField(default=0)),
+                ('last_payment_date', models.DateField()),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dues_coverage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Dues Coverage',
+                'verbose_name_plural': 'Dues Coverage',
+                'indexes': [models.Index(fields=['year', 'month'], name='dues_coverage_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('member', 'year', 'month'), name='unique_dues_coverage_month')],
+            },
+        ),
+        migrations.RunPython(populate_dues_coverage, migrations.RunPython.noop),
+    ]
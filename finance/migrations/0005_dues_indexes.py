@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0004_duescoverage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dues',
+            index=models.Index(fields=['member', '-payment_date'], name='dues_member_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dues',
+            index=models.Index(fields=['payment_date'], name='dues_payment_date_idx'),
+        ),
+    ]
@@ -1,9 +1,71 @@
-import uuid
-from django.db import models
+import datetime
+from decimal import Decimal
+
+from django.db import connection, models, transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Subquery, Sum, Value, When
 from django.conf import settings
 
+from accounts.models import CustomUser
+
+
+class ReceiptSequenceManager(models.Manager):
+
+    def reserve(self, name, count=1):
+        """
+        Reserves `count` consecutive numbers from the named sequence and returns
+        the first one. The counter row stays locked until the surrounding
+        transaction ends, so numbers are only consumed if the caller commits.
+        """
+        with transaction.atomic():
+            sequence, _ = self.select_for_update().get_or_create(name=name)
+            first_number = sequence.last_value + 1
+            sequence.last_value += count
+            sequence.save(update_fields=['last_value'])
+        return first_number
+
+
+class ReceiptSequence(models.Model):
+    """
+    A named, gap-free counter used to hand out receipt numbers in blocks.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    objects = ReceiptSequenceManager()
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+
+def month_bounds(day):
+    """Returns the half-open [start, end) date range of the month containing `day`."""
+    start = day.replace(day=1)
+    return start, (start + datetime.timedelta(days=32)).replace(day=1)
+
+
+def year_bounds(year):
+    """Returns the half-open [start, end) date range of `year`."""
+    return datetime.date(year, 1, 1), datetime.date(year + 1, 1, 1)
+
+
+class DuesQuerySet(models.QuerySet):
+    """
+    Period filters written as plain ranges on payment_date, so the date
+    indexes serve them instead of extracting the year or month from every row.
+    """
+    def in_year(self, year):
+        start, end = year_bounds(year)
+        return self.filter(payment_date__gte=start, payment_date__lt=end)
+
+    def in_month(self, day):
+        """Payments in the month containing the date `day`."""
+        start, end = month_bounds(day)
+        return self.filter(payment_date__gte=start, payment_date__lt=end)
+
 
 class Dues(models.Model):
+    RECEIPT_SEQUENCE = 'dues'
+
     member = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -15,13 +77,279 @@ class Dues(models.Model):
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DuesQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # A member's statement and history, newest first.
+            models.Index(fields=['member', '-payment_date'], name='dues_member_date_idx'),
+            # Recent activity and date-range totals across all members.
+            models.Index(fields=['payment_date'], name='dues_payment_date_idx'),
+        ]
+
+    @classmethod
+    def allocate_receipt_numbers(cls, payment_dates):
+        """
+        Returns one receipt number per payment date, reserving the whole block
+        from the receipt sequence in a single step. Used by save() and by any
+        code that creates Dues with bulk_create.
+        """
+        payment_dates = list(payment_dates)
+        if not payment_dates:
+            return []
+        first_number = ReceiptSequence.objects.reserve(cls.RECEIPT_SEQUENCE, len(payment_dates))
+        # Format: RCPT-YYYYMMDD-10DIGIT_SEQUENCE. The sequence part is longer than
+        # the 8-character ids of older receipts, so the two can never clash.
+        return [
+            f"RCPT-{payment_date.strftime('%Y%m%d')}-{first_number + offset:010d}"
+            for offset, payment_date in enumerate(payment_dates)
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.receipt_number:
-            # Format: RCPT-YYYYMMDD-8CHAR_UUID
-            date_str = self.payment_date.strftime('%Y%m%d')
-            unique_id = str(uuid.uuid4()).split('-')[0].upper()
-            self.receipt_number = f"RCPT-{date_str}-{unique_id}"
-        super().save(*args, **kwargs)
+        # Reserve the receipt number and insert the row together, so a failed
+        # insert does not leave a gap in the sequence.
+        with transaction.atomic():
+            if not self.receipt_number:
+                self.receipt_number = self.allocate_receipt_numbers([self.payment_date])[0]
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Dues from {self.member.get_full_name()} on {self.payment_date}"
+
+
+class FundLedgerManager(models.Manager):
+    """
+    Reads and maintains the per-month dues totals so dashboards and reports
+    never have to aggregate over the whole Dues table.
+    """
+
+    def record(self, year, month, amount, count=1):
+        """
+        Applies a delta to the ledger row for the given month, creating it if needed.
+        A negative amount/count is used when a payment is removed or moved.
+        """
+        self.record_many({(year, month): (amount, count)})
+
+    def record_many(self, deltas):
+        """
+        Applies several monthly deltas at once. `deltas` maps (year, month) to
+        (amount, count). Missing rows are inserted in one statement and all rows
+        are updated in a single UPDATE, whatever the number of months.
+        """
+        if not deltas:
+            return
+        self.bulk_create(
+            [self.model(year=year, month=month) for year, month in deltas],
+            ignore_conflicts=True,
+        )
+        month_filter = Q()
+        amount_cases, count_cases = [], []
+        for (year, month), (amount, count) in deltas.items():
+            month_filter |= Q(year=year, month=month)
+            amount_cases.append(When(year=year, month=month, then=Value(amount)))
+            count_cases.append(When(year=year, month=month, then=Value(count)))
+        self.filter(month_filter).update(
+            total_amount=F('total_amount') + Case(*amount_cases, output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+            payment_count=F('payment_count') + Case(*count_cases, output_field=models.IntegerField()),
+        )
+
+    def rebuild(self):
+        """
+        Recomputes every ledger row from the Dues table. Used after bulk inserts,
+        which bypass the signals that normally keep the ledger in sync.
+        Returns the number of ledger rows written.
+        """
+        monthly_totals = {}
+        for payment_date, amount in Dues.objects.values_list('payment_date', 'amount').iterator(chunk_size=2000):
+            key = (payment_date.year, payment_date.month)
+            total, count = monthly_totals.get(key, (Decimal('0.00'), 0))
+            monthly_totals[key] = (total + amount, count + 1)
+
+        self.all().delete()
+        self.bulk_create([
+            self.model(year=year, month=month, total_amount=total, payment_count=count)
+            for (year, month), (total, count) in monthly_totals.items()
+        ])
+        return len(monthly_totals)
+
+    def total_balance(self):
+        """Total of all dues ever paid."""
+        return self.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+
+    def total_for_year(self, year):
+        return self.filter(year=year).aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
+
+    def total_for_month(self, year, month):
+        entry = self.filter(year=year, month=month).only('total_amount').first()
+        return entry.total_amount if entry else Decimal('0.00')
+
+
+class FundLedger(models.Model):
+    """
+    A materialized summary of dues per calendar month. It is kept up to date by
+    the signal handlers in finance/signals.py and can be rebuilt from scratch
+    with `manage.py rebuild_fund_ledger`.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    payment_count = models.PositiveIntegerField(default=0)
+
+    objects = FundLedgerManager()
+
+    class Meta:
+        verbose_name = "Fund Ledger Entry"
+        verbose_name_plural = "Fund Ledger"
+        ordering = ['-year', '-month']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='unique_fund_ledger_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.year}-{self.month:02d}: {self.total_amount}"
+
+
+class DuesCoverageManager(models.Manager):
+    """
+    Keeps one row per member and month that has at least one payment, so
+    "who hasn't paid this month" and "last payment date" are indexed lookups
+    instead of scans over the member's whole dues history.
+    """
+
+    def _summarize(self, payments):
+        # payments: iterable of (member_id, payment_date, amount)
+        cells = {}
+        for member_id, payment_date, amount in payments:
+            key = (member_id, payment_date.year, payment_date.month)
+            total, count, last_date = cells.get(key, (Decimal('0.00'), 0, payment_date))
+            cells[key] = (total + amount, count + 1, max(last_date, payment_date))
+        return [
+            self.model(
+                member_id=member_id, year=year, month=month,
+                total_amount=total, payment_count=count, last_payment_date=last_date,
+            )
+            for (member_id, year, month), (total, count, last_date) in cells.items()
+        ]
+
+    def refresh(self, member_id, months):
+        """
+        Recomputes the coverage rows for one member and the given (year, month)
+        pairs from the Dues table.
+        """
+        self.refresh_many({member_id: months})
+
+    def refresh_many(self, member_months):
+        """
+        Recomputes coverage rows for several members at once. `member_months`
+        maps member_id to an iterable of (year, month) pairs. The Dues table is
+        read in one query and all rows are written with one upsert.
+        """
+        member_months = {member_id: set(months) for member_id, months in member_months.items() if months}
+        if not member_months:
+            return
+        all_months = set().union(*member_months.values())
+        first_year, first_month = min(all_months)
+        last_year, last_month = max(all_months)
+        start = datetime.date(first_year, first_month, 1)
+        end = month_bounds(datetime.date(last_year, last_month, 1))[1]
+
+        payments = Dues.objects.filter(
+            member_id__in=member_months, payment_date__gte=start, payment_date__lt=end,
+        ).values_list('member_id', 'payment_date', 'amount')
+        rows = [
+            row for row in self._summarize(payments)
+            if (row.year, row.month) in member_months[row.member_id]
+        ]
+
+        covered = {(row.member_id, row.year, row.month) for row in rows}
+        empty_cells = Q()
+        for member_id, months in member_months.items():
+            for year, month in months:
+                if (member_id, year, month) not in covered:
+                    empty_cells |= Q(member_id=member_id, year=year, month=month)
+        if empty_cells:
+            self.filter(empty_cells).delete()
+
+        # MySQL cannot name the conflict target; it matches on the unique key anyway.
+        conflict_target = {}
+        if connection.features.supports_update_conflicts_with_target:
+            conflict_target['unique_fields'] = ['member', 'year', 'month']
+        self.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            update_fields=['total_amount', 'payment_count', 'last_payment_date'],
+            **conflict_target,
+        )
+
+    def month_totals(self, member_ids, since):
+        """
+        Amount already paid per member and month from `since` onwards, as
+        {member_id: {(year, month): Decimal}}. Used to respect the monthly cap
+        when spreading payments without re-reading the Dues table.
+        """
+        totals = {member_id: {} for member_id in member_ids}
+        rows = self.filter(member_id__in=member_ids).filter(
+            Q(year__gt=since.year) | Q(year=since.year, month__gte=since.month)
+        ).values_list('member_id', 'year', 'month', 'total_amount')
+        for member_id, year, month, total in rows:
+            totals[member_id][(year, month)] = total
+        return totals
+
+    def rebuild(self):
+        """
+        Recomputes every coverage row from the Dues table. Returns the number of rows written.
+        """
+        payments = Dues.objects.values_list('member_id', 'payment_date', 'amount').iterator(chunk_size=2000)
+        rows = self._summarize(payments)
+        self.all().delete()
+        self.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+    def outstanding_members(self, year, month):
+        """Active, non-superuser members with no payment recorded for the given month."""
+        paid_for_month = self.filter(member=OuterRef('pk'), year=year, month=month)
+        return CustomUser.objects.filter(
+            is_superuser=False, is_active=True
+        ).exclude(Exists(paid_for_month))
+
+    def last_payment_date(self):
+        """
+        A subquery expression for annotating CustomUser querysets with the
+        member's most recent payment date.
+        """
+        return Subquery(
+            self.filter(member=OuterRef('pk')).order_by('-year', '-month').values('last_payment_date')[:1]
+        )
+
+
+class DuesCoverage(models.Model):
+    """
+    Dues paid by a member for one calendar month. Kept in sync by the signal
+    handlers in finance/signals.py and by finance.services.allocate_payment.
+    """
+    member = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='dues_coverage'
+    )
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    payment_count = models.PositiveIntegerField(default=0)
+    last_payment_date = models.DateField()
+
+    objects = DuesCoverageManager()
+
+    class Meta:
+        verbose_name = "Dues Coverage"
+        verbose_name_plural = "Dues Coverage"
+        constraints = [
+            models.UniqueConstraint(fields=['member', 'year', 'month'], name='unique_dues_coverage_month'),
+        ]
+        indexes = [
+            models.Index(fields=['year', 'month'], name='dues_coverage_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.member_id} {self.year}-{self.month:02d}: {self.total_amount}"
@@ -0,0 +1,105 @@
+"""
+Builders for the yearly financial report shown to the finance team and the
+chairperson. Each section is computed with a single query so the report
+costs the same number of queries however much data there is.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Concat
+
+from accounts.models import CustomUser
+from members.models import Benefit
+from .models import Dues, FundLedger
+
+
+def ledger_section(year):
+    """
+    Fund balance, available years, the year's contributions and its monthly
+    breakdown, all from one read of the (small) monthly ledger table.
+    """
+    total_fund_balance = Decimal('0.00')
+    available_years = set()
+    monthly_breakdown = []
+
+    rows = FundLedger.objects.filter(payment_count__gt=0).order_by('year', 'month').values_list(
+        'year', 'month', 'total_amount'
+    )
+    for row_year, row_month, total in rows:
+        total_fund_balance += total
+        available_years.add(row_year)
+        if row_year == year:
+            monthly_breakdown.append({'month': datetime.date(row_year, row_month, 1), 'total': total})
+
+    return {
+        'total_fund_balance': total_fund_balance,
+        'available_years': sorted(available_years, reverse=True),
+        'yearly_total_contributions': sum((item['total'] for item in monthly_breakdown), Decimal('0.00')),
+        'monthly_breakdown': monthly_breakdown,
+    }
+
+
+def top_contributors(year, limit=10):
+    return list(Dues.objects.in_year(year).values(
+        'member__id',
+    ).annotate(
+        full_name=Concat('member__first_name', Value(' '), 'member__last_name'),
+        total_paid=Sum('amount')
+    ).order_by('-total_paid')[:limit])
+
+
+def benefit_section(year):
+    """
+    Counts by status and honoured totals for benefits submitted in `year`,
+    computed in one conditional-aggregate pass.
+    """
+    honoured = Q(honoured=True)
+    metrics = Benefit.objects.in_year(year).aggregate(
+        total_benefits=Count('pk'),
+        pending_benefits=Count('pk', filter=Q(status='Pending')),
+        approved_benefits=Count('pk', filter=Q(status='Approved')),
+        denied_benefits=Count('pk', filter=Q(status='Denied')),
+        honoured_benefits=Count('pk', filter=honoured),
+        total_amount_honoured=Sum('amount', filter=honoured),
+    )
+    metrics['total_amount_honoured'] = metrics['total_amount_honoured'] or Decimal('0.00')
+    return metrics
+
+
+def benefit_breakdown(year):
+    """Honoured benefits for the year grouped by type, with their total amount and count."""
+    return list(Benefit.objects.in_year(year).filter(
+        honoured=True
+    ).values('benefit_type').annotate(
+        total_amount=Sum('amount'),
+        count=Count('pk'),
+    ).order_by('-total_amount'))
+
+
+def build_financial_report(year):
+    """
+    Returns the context shared by the finance and chairperson report pages.
+    """
+    report = {'selected_year': year}
+    report.update(ledger_section(year))
+    report.update(benefit_section(year))
+
+    # Ensure the selected year is in the list, especially for the current year
+    # if no payments have been made yet.
+    if year not in report['available_years']:
+        report['available_years'] = sorted(report['available_years'] + [year], reverse=True)
+
+    total_members = CustomUser.objects.filter(is_superuser=False, is_active=True).count()
+    yearly_total = report['yearly_total_contributions']
+    report['total_members'] = total_members
+    report['average_contribution'] = (yearly_total / total_members) if total_members > 0 else Decimal('0.00')
+    report['top_contributors'] = top_contributors(year)
+    report['benefit_breakdown'] = benefit_breakdown(year)
+
+    # Net position: what was collected against what was paid out in benefits.
+    report['total_benefits_paid_for_year'] = report['total_amount_honoured']
+    report['total_honoured_benefits_for_year'] = report['honoured_benefits']
+    report['net_for_year'] = yearly_total - report['total_amount_honoured']
+    report['balance_after_benefits'] = report['total_fund_balance'] - report['total_amount_honoured']
+    return report
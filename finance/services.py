@@ -0,0 +1,303 @@
+import csv
+import datetime
+import io
+import re
+import time
+from decimal import Decimal
+
+from django.db import transaction
+
+from accounts.models import CustomUser
+from utils.dashboard_cache import bump_dashboard_version, invalidate_member_summaries
+from .models import Dues, DuesCoverage, FundLedger
+
+# The maximum amount that can be recorded for a single month.
+MAX_MONTHLY_PAYMENT = Decimal('10.00')
+
+
+def next_month_start(date):
+    """A reliable way to get the first day of the month after `date`."""
+    return (date.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def plan_allocation(amount, payment_date, existing_totals, notes=None, max_monthly=MAX_MONTHLY_PAYMENT):
+    """
+    Splits a payment into monthly portions without touching the database.
+
+    The month of `payment_date` is topped up first, then whatever is left is
+    carried over to the following months. `existing_totals` maps (year, month)
+    to the amount already paid for that month, so no month is ever filled past
+    `max_monthly`.
+
+    Returns a list of (payment_date, amount, notes) tuples.
+    """
+    allocations = []
+    remaining = amount
+    current_date = payment_date
+
+    while remaining > 0:
+        already_paid = existing_totals.get((current_date.year, current_date.month), Decimal('0.00'))
+        room_in_month = max(Decimal('0.00'), max_monthly - already_paid)
+        portion = min(remaining, room_in_month)
+
+        if portion > 0:
+            if current_date == payment_date:
+                portion_notes = notes
+            else:
+                portion_notes = f"Carried over from payment on {payment_date.strftime('%Y-%m-%d')}"
+            allocations.append((current_date, portion, portion_notes))
+            remaining -= portion
+
+        current_date = next_month_start(current_date)
+
+    return allocations
+
+
+def write_allocations(planned, batch_size=None):
+    """
+    Writes planned Dues rows and updates the summary tables that bulk_create
+    would otherwise skip. `planned` is a list of (member_id, payment_date,
+    amount, notes) tuples. Must be called inside a transaction.
+
+    Returns the list of created Dues objects.
+    """
+    if not planned:
+        return []
+
+    # bulk_create bypasses Dues.save(), so the receipts are reserved here as one block.
+    receipt_numbers = Dues.allocate_receipt_numbers(payment_date for _, payment_date, _, _ in planned)
+    dues = Dues.objects.bulk_create([
+        Dues(
+            member_id=member_id,
+            amount=amount,
+            payment_date=payment_date,
+            notes=notes,
+            receipt_number=receipt_number,
+        )
+        for (member_id, payment_date, amount, notes), receipt_number in zip(planned, receipt_numbers)
+    ], batch_size=batch_size)
+
+    # bulk_create also skips the ledger signals, so update the summaries directly.
+    ledger_deltas = {}
+    member_months = {}
+    for member_id, payment_date, amount, _ in planned:
+        month = (payment_date.year, payment_date.month)
+        total, count = ledger_deltas.get(month, (Decimal('0.00'), 0))
+        ledger_deltas[month] = (total + amount, count + 1)
+        member_months.setdefault(member_id, set()).add(month)
+    FundLedger.objects.record_many(ledger_deltas)
+    DuesCoverage.objects.refresh_many(member_months)
+    bump_dashboard_version()
+    invalidate_member_summaries(member_months)
+
+    return dues
+
+
+def allocate_payment(member, amount, payment_date, notes=None, max_monthly=MAX_MONTHLY_PAYMENT):
+    """
+    Records a dues payment for `member`, spreading it across months so that no
+    month exceeds `max_monthly`.
+
+    The member row is locked for the duration of the transaction so two tellers
+    recording payments for the same member cannot both see the same free room
+    in a month. Existing month totals are read in one query, the split is
+    computed in memory and all Dues rows are written with a single bulk_create.
+
+    Returns the list of created Dues objects.
+    """
+    with transaction.atomic():
+        CustomUser.objects.select_for_update().get(pk=member.pk)
+
+        existing_totals = DuesCoverage.objects.month_totals([member.pk], payment_date)[member.pk]
+        allocations = plan_allocation(amount, payment_date, existing_totals, notes, max_monthly)
+
+        return write_allocations([
+            (member.pk, portion_date, portion, portion_notes)
+            for portion_date, portion, portion_notes in allocations
+        ])
+
+
+# Date formats accepted in imported payment files (bank and mobile-money exports).
+IMPORT_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+
+# Amounts in imported files, once thousands separators are removed: plain
+# digits with up to two decimal places. Exponents, signs and NaN/Infinity are rejected.
+IMPORT_AMOUNT_PATTERN = re.compile(r'^\d+(\.\d{1,2})?$')
+
+# The largest single payment an import accepts: five years of dues. Anything
+# larger is almost certainly a misread column and would be spread over
+# hundreds of months.
+MAX_IMPORT_AMOUNT = MAX_MONTHLY_PAYMENT * 60
+
+# Encodings tried, in order, for imported payment files. Excel on Windows
+# saves CSV in the ANSI code page unless told otherwise.
+IMPORT_ENCODINGS = ('utf-8-sig', 'cp1252')
+
+
+class PaymentImportResult:
+    """
+    Summary of a bulk payment import: accepted rows, rejected rows with their
+    reasons, and per-batch timings for the throughput report.
+    """
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows_read = 0
+        self.rows_accepted = 0
+        self.dues_created = 0
+        self.amount_total = Decimal('0.00')
+        self.rejected = []  # (line_number, reason)
+        self.batches = []   # (batch_number, dues_written, seconds)
+
+
+def normalize_phone(phone):
+    """Reduces a phone number to local digits, e.g. '+233 24 123 4567' -> '0241234567'."""
+    digits = ''.join(ch for ch in (phone or '') if ch.isdigit())
+    if digits.startswith('233') and len(digits) == 12:
+        digits = '0' + digits[3:]
+    return digits
+
+
+def parse_import_date(value):
+    value = (value or '').strip()
+    for date_format in IMPORT_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid payment date '{value}'.")
+
+
+def parse_import_amount(value, max_amount=MAX_IMPORT_AMOUNT):
+    cleaned = (value or '').strip().replace(',', '')
+    if not IMPORT_AMOUNT_PATTERN.match(cleaned):
+        raise ValueError(f"Invalid amount '{value}'.")
+    amount = Decimal(cleaned).quantize(Decimal('0.01'))
+    if amount <= 0:
+        raise ValueError("Amount must be greater than zero.")
+    if amount > max_amount:
+        raise ValueError(f"Amount {amount} is more than the {max_amount} allowed for a single payment.")
+    return amount
+
+
+def read_import_file(binary_file):
+    """
+    Decodes an imported payments file and returns its rows as a list of
+    dicts keyed by the header row. Raises ValueError when the file is not
+    text in one of IMPORT_ENCODINGS or is not readable as CSV.
+    """
+    content = binary_file.read()
+    for encoding in IMPORT_ENCODINGS:
+        try:
+            text = content.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError("The file is not a text CSV file. Save it as CSV (UTF-8) and try again.")
+    try:
+        return list(csv.DictReader(io.StringIO(text, newline='')))
+    except csv.Error as error:
+        raise ValueError(f"The file could not be read as CSV: {error}.")
+
+
+def build_member_lookups():
+    """
+    Loads staff ID and phone number lookups for all members in one query.
+    Phone numbers shared by more than one member map to None, since a
+    payment cannot be assigned to them unambiguously.
+    """
+    by_staff_id, by_phone = {}, {}
+    members = CustomUser.objects.filter(is_superuser=False).values_list('pk', 'staff_id', 'phone_number')
+    for pk, staff_id, phone_number in members.iterator(chunk_size=2000):
+        if staff_id:
+            by_staff_id[staff_id.strip().upper()] = pk
+        phone = normalize_phone(phone_number)
+        if phone:
+            by_phone[phone] = None if phone in by_phone else pk
+    return by_staff_id, by_phone
+
+
+def resolve_import_member(row, by_staff_id, by_phone):
+    staff_id = (row.get('staff_id') or '').strip().upper()
+    if staff_id:
+        if staff_id not in by_staff_id:
+            raise ValueError(f"No member with staff ID '{staff_id}'.")
+        return by_staff_id[staff_id]
+
+    phone = normalize_phone(row.get('phone_number') or row.get('phone'))
+    if not phone:
+        raise ValueError("Row has neither a staff ID nor a phone number.")
+    if phone not in by_phone:
+        raise ValueError(f"No member with phone number '{phone}'.")
+    if by_phone[phone] is None:
+        raise ValueError(f"Phone number '{phone}' belongs to more than one member.")
+    return by_phone[phone]
+
+
+def import_payments(rows, dry_run=False, batch_size=500, max_monthly=MAX_MONTHLY_PAYMENT):
+    """
+    Imports payments from an iterable of dicts with the keys staff_id or
+    phone_number, amount, payment_date and optionally notes (e.g. rows from
+    csv.DictReader).
+
+    Each payment is spread across months with the same rules as a payment
+    recorded on the member detail page. All rows are validated and planned in
+    memory first, then written in batches of `batch_size` Dues rows inside a
+    single transaction. With `dry_run` nothing is written and the result only
+    reports what would be imported or rejected.
+    """
+    result = PaymentImportResult(dry_run=dry_run)
+    by_staff_id, by_phone = build_member_lookups()
+
+    payments = []
+    # Line 1 of the file is the header, so data rows start at line 2.
+    for line_number, row in enumerate(rows, start=2):
+        result.rows_read += 1
+        try:
+            member_id = resolve_import_member(row, by_staff_id, by_phone)
+            amount = parse_import_amount(row.get('amount'))
+            payment_date = parse_import_date(row.get('payment_date'))
+        except ValueError as error:
+            result.rejected.append((line_number, str(error)))
+            continue
+        notes = (row.get('notes') or '').strip() or None
+        payments.append((member_id, amount, payment_date, notes))
+
+    result.rows_accepted = len(payments)
+    if not payments:
+        return result
+
+    with transaction.atomic():
+        member_ids = sorted({member_id for member_id, _, _, _ in payments})
+        earliest = min(payment_date for _, _, payment_date, _ in payments)
+
+        existing_totals = {}
+        for start in range(0, len(member_ids), 500):
+            chunk = member_ids[start:start + 500]
+            if not dry_run:
+                # Lock the members so concurrent tellers cannot overfill a month mid-import.
+                list(CustomUser.objects.select_for_update().filter(pk__in=chunk).values_list('pk', flat=True))
+            existing_totals.update(DuesCoverage.objects.month_totals(chunk, earliest))
+
+        planned = []
+        for member_id, amount, payment_date, notes in payments:
+            member_totals = existing_totals[member_id]
+            for portion_date, portion, portion_notes in plan_allocation(
+                amount, payment_date, member_totals, notes, max_monthly
+            ):
+                month = (portion_date.year, portion_date.month)
+                member_totals[month] = member_totals.get(month, Decimal('0.00')) + portion
+                planned.append((member_id, portion_date, portion, portion_notes))
+            result.amount_total += amount
+
+        result.dues_created = len(planned)
+        if dry_run:
+            return result
+
+        for batch_number, start in enumerate(range(0, len(planned), batch_size), start=1):
+            started = time.perf_counter()
+            batch = planned[start:start + batch_size]
+            write_allocations(batch)
+            result.batches.append((batch_number, len(batch), time.perf_counter() - started))
+
+    return result
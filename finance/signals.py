@@ -0,0 +1,57 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.models import CustomUser
+from members.models import Benefit
+from secretary.models import Announcement
+from utils.dashboard_cache import invalidate_dashboard_metrics, invalidate_member_summaries
+from .models import Dues, DuesCoverage, FundLedger
+
+
+@receiver(pre_save, sender=Dues)
+def remember_previous_dues_values(sender, instance, **kwargs):
+    """
+    Stores the member, amount and date currently in the database so post_save
+    can move the right amount between months when a payment is edited.
+    """
+    instance._ledger_previous = None
+    if instance.pk:
+        instance._ledger_previous = Dues.objects.filter(pk=instance.pk).values_list(
+            'member_id', 'payment_date', 'amount'
+        ).first()
+
+
+@receiver(post_save, sender=Dues)
+def update_ledger_on_dues_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    month = (instance.payment_date.year, instance.payment_date.month)
+    previous = getattr(instance, '_ledger_previous', None)
+    if previous:
+        old_member_id, old_date, old_amount = previous
+        old_month = (old_date.year, old_date.month)
+        FundLedger.objects.record(*old_month, -old_amount, count=-1)
+        if old_member_id != instance.member_id:
+            invalidate_member_summaries([old_member_id])
+            DuesCoverage.objects.refresh(old_member_id, [old_month])
+            DuesCoverage.objects.refresh(instance.member_id, [month])
+        else:
+            DuesCoverage.objects.refresh(instance.member_id, [old_month, month])
+    else:
+        DuesCoverage.objects.refresh(instance.member_id, [month])
+    FundLedger.objects.record(*month, instance.amount)
+    invalidate_member_summaries([instance.member_id])
+
+
+@receiver(post_delete, sender=Dues)
+def update_ledger_on_dues_delete(sender, instance, **kwargs):
+    month = (instance.payment_date.year, instance.payment_date.month)
+    FundLedger.objects.record(*month, -instance.amount, count=-1)
+    DuesCoverage.objects.refresh(instance.member_id, [month])
+    invalidate_member_summaries([instance.member_id])
+
+
+# Any change to the data shown on the role dashboards invalidates their cached metrics.
+for dashboard_model in (Dues, Benefit, CustomUser, Announcement):
+    post_save.connect(invalidate_dashboard_metrics, sender=dashboard_model, dispatch_uid=f'dashboard_cache_save_{dashboard_model.__name__}')
+    post_delete.connect(invalidate_dashboard_metrics, sender=dashboard_model, dispatch_uid=f'dashboard_cache_delete_{dashboard_model.__name__}')
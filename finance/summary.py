@@ -0,0 +1,68 @@
+"""
+The numbers on a member's own dashboard, computed together and cached per
+member.
+
+A member's total contribution, whether this month is paid and their arrears
+all come from one aggregate over their DuesCoverage rows. The recent payments
+are one more fetch. The result is cached under a per-member key for the day,
+and finance/signals.py and finance.services clear it once a change to that
+member's dues commits.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from utils.dashboard_cache import DASHBOARD_CACHE_TIMEOUT, member_summary_key
+from .arrears import build_arrears, joined_month_index, month_index
+from .models import Dues, DuesCoverage
+from .services import MAX_MONTHLY_PAYMENT
+
+RECENT_PAYMENTS = 5
+
+MemberSummary = namedtuple('MemberSummary', [
+    'total_contribution', 'has_paid_this_month', 'arrears', 'recent_payments',
+])
+
+
+def _months_between(first, last):
+    """Q for DuesCoverage rows from the month index `first` to `last`, inclusive."""
+    first_year, first_month = divmod(first - 1, 12)
+    last_year, last_month = divmod(last - 1, 12)
+    return (
+        (Q(year__gt=first_year) | Q(year=first_year, month__gte=first_month + 1))
+        & (Q(year__lt=last_year) | Q(year=last_year, month__lte=last_month + 1))
+    )
+
+
+def build_member_summary(member, today=None, monthly_amount=MAX_MONTHLY_PAYMENT):
+    """Computes a MemberSummary without the cache, in two queries."""
+    today = today or timezone.now().date()
+    joined_month, current_month = joined_month_index(member), month_index(today)
+
+    totals = DuesCoverage.objects.filter(member=member).aggregate(
+        total_paid=Coalesce(Sum('total_amount'), Value(Decimal('0.00')), output_field=DecimalField()),
+        months_covered=Count('pk', filter=_months_between(joined_month, current_month) & Q(
+            total_amount__gte=monthly_amount,
+        )),
+        paid_this_month=Count('pk', filter=Q(year=today.year, month=today.month)),
+    )
+    recent_payments = list(Dues.objects.filter(member=member).order_by('-payment_date', '-pk')[:RECENT_PAYMENTS])
+
+    return MemberSummary(
+        total_contribution=totals['total_paid'],
+        has_paid_this_month=totals['paid_this_month'] > 0,
+        arrears=build_arrears(joined_month, current_month, totals['total_paid'], totals['months_covered'], monthly_amount),
+        recent_payments=recent_payments,
+    )
+
+
+def member_summary(member):
+    """Returns the member's cached MemberSummary, computing it on a miss."""
+    today = timezone.now().date()
+    return cache.get_or_set(
+        member_summary_key(member.pk, today), lambda: build_member_summary(member, today), DASHBOARD_CACHE_TIMEOUT
+    )
@@ -1,3 +1,737 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core import signing
+from django.db import connection
+from django.db.models import Sum
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from members.models import Benefit
+from secretary.models import Announcement
+from utils.dashboard_cache import get_dashboard_version
+from utils.pagination import CURSOR_SALT, DUES_ORDERING, MEMBER_ORDERING, CursorPaginator
+from .arrears import cached_arrears, compute_arrears
+from .models import Dues, DuesCoverage, FundLedger, ReceiptSequence
+from .services import MAX_IMPORT_AMOUNT, MAX_MONTHLY_PAYMENT, allocate_payment, import_payments, plan_allocation
+from .summary import build_member_summary, member_summary
+from .reports import build_financial_report
+
+
+class FundLedgerTests(TestCase):
+    """
+    Every kind of Dues write must leave the ledger with the same totals a
+    rebuild from the Dues table would produce.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+
+    def assertLedger(self, expected):
+        """`expected` maps (year, month) to (total_amount, payment_count)."""
+        rows = {
+            (year, month): (total, count)
+            for year, month, total, count in FundLedger.objects.values_list('year', 'month', 'total_amount', 'payment_count')
+            if count
+        }
+        self.assertEqual(rows, expected)
+
+    def pay(self, amount, date):
+        return Dues.objects.create(member=self.member, amount=Decimal(amount), payment_date=date)
+
+    def test_create(self):
+        self.pay('10.00', datetime.date(2024, 1, 5))
+        self.pay('5.00', datetime.date(2024, 1, 20))
+        self.pay('7.50', datetime.date(2024, 2, 1))
+        self.assertLedger({(2024, 1): (Decimal('15.00'), 2), (2024, 2): (Decimal('7.50'), 1)})
+        self.assertEqual(FundLedger.objects.total_balance(), Decimal('22.50'))
+        self.assertEqual(FundLedger.objects.total_for_year(2024), Decimal('22.50'))
+        self.assertEqual(FundLedger.objects.total_for_month(2024, 1), Decimal('15.00'))
+
+    def test_amount_edit(self):
+        dues = self.pay('10.00', datetime.date(2024, 1, 5))
+        dues.amount = Decimal('4.00')
+        dues.save()
+        self.assertLedger({(2024, 1): (Decimal('4.00'), 1)})
+
+    def test_date_moved_across_months(self):
+        self.pay('3.00', datetime.date(2024, 1, 10))
+        dues = self.pay('10.00', datetime.date(2024, 1, 5))
+        dues.payment_date = datetime.date(2024, 3, 5)
+        dues.amount = Decimal('6.00')
+        dues.save()
+        self.assertLedger({(2024, 1): (Decimal('3.00'), 1), (2024, 3): (Decimal('6.00'), 1)})
+
+    def test_delete(self):
+        self.pay('3.00', datetime.date(2024, 1, 10))
+        self.pay('10.00', datetime.date(2024, 1, 5)).delete()
+        self.pay('10.00', datetime.date(2024, 2, 5)).delete()
+        self.assertLedger({(2024, 1): (Decimal('3.00'), 1)})
+        self.assertEqual(FundLedger.objects.total_balance(), Decimal('3.00'))
+
+    def test_rebuild(self):
+        self.pay('10.00', datetime.date(2024, 1, 5))
+        self.pay('5.00', datetime.date(2023, 12, 5))
+        # bulk_create skips the signals, leaving the ledger behind until a rebuild.
+        Dues.objects.bulk_create([
+            Dues(member=self.member, amount=Decimal('2.00'), payment_date=datetime.date(2024, 1, 6), receipt_number='RCPT-A'),
+            Dues(member=self.member, amount=Decimal('8.00'), payment_date=datetime.date(2024, 4, 6), receipt_number='RCPT-B'),
+        ])
+        FundLedger.objects.create(year=2020, month=1, total_amount=Decimal('99.00'), payment_count=1)
+
+        self.assertEqual(FundLedger.objects.rebuild(), 3)
+        self.assertLedger({
+            (2023, 12): (Decimal('5.00'), 1),
+            (2024, 1): (Decimal('12.00'), 2),
+            (2024, 4): (Decimal('8.00'), 1),
+        })
+        self.assertEqual(FundLedger.objects.total_balance(), Dues.objects.aggregate(total=Sum('amount'))['total'])
+
+
+class AllocationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+
+    def test_plan_spreads_across_months(self):
+        planned = plan_allocation(Decimal('25.00'), datetime.date(2024, 1, 15), {}, notes='Cash')
+        self.assertEqual(planned, [
+            (datetime.date(2024, 1, 15), Decimal('10.00'), 'Cash'),
+            (datetime.date(2024, 2, 1), Decimal('10.00'), 'Carried over from payment on 2024-01-15'),
+            (datetime.date(2024, 3, 1), Decimal('5.00'), 'Carried over from payment on 2024-01-15'),
+        ])
+
+    def test_plan_tops_up_partly_paid_months(self):
+        existing = {(2024, 1): Decimal('6.00'), (2024, 2): MAX_MONTHLY_PAYMENT, (2024, 3): Decimal('9.00')}
+        planned = plan_allocation(Decimal('8.00'), datetime.date(2024, 1, 15), existing)
+        self.assertEqual([(date.month, amount) for date, amount, _ in planned], [
+            (1, Decimal('4.00')), (3, Decimal('1.00')), (4, Decimal('3.00')),
+        ])
+
+    def test_plan_respects_custom_cap(self):
+        planned = plan_allocation(Decimal('12.00'), datetime.date(2024, 11, 30), {}, max_monthly=Decimal('5.00'))
+        self.assertEqual([(date, amount) for date, amount, _ in planned], [
+            (datetime.date(2024, 11, 30), Decimal('5.00')),
+            (datetime.date(2024, 12, 1), Decimal('5.00')),
+            (datetime.date(2025, 1, 1), Decimal('2.00')),
+        ])
+
+    def test_allocate_payment_never_exceeds_cap(self):
+        Dues.objects.create(member=self.member, amount=Decimal('7.00'), payment_date=datetime.date(2024, 1, 3))
+        allocate_payment(self.member, Decimal('15.00'), datetime.date(2024, 1, 20))
+        allocate_payment(self.member, Decimal('4.00'), datetime.date(2024, 1, 25))
+
+        totals = DuesCoverage.objects.month_totals([self.member.pk], datetime.date(2024, 1, 1))[self.member.pk]
+        self.assertEqual(totals, {
+            (2024, 1): Decimal('10.00'), (2024, 2): Decimal('10.00'), (2024, 3): Decimal('6.00'),
+        })
+        self.assertEqual(FundLedger.objects.total_balance(), Decimal('26.00'))
+        self.assertEqual(Dues.objects.filter(member=self.member).count(), 5)
+
+    def test_allocate_payment_query_count_is_independent_of_months(self):
+        allocate_payment(self.member, Decimal('10.00'), datetime.date(2023, 1, 1))  # creates the receipt sequence
+        with CaptureQueriesContext(connection) as one_month:
+            allocate_payment(self.member, Decimal('10.00'), datetime.date(2024, 1, 1))
+        with CaptureQueriesContext(connection) as twelve_months:
+            allocate_payment(self.member, Decimal('120.00'), datetime.date(2025, 1, 1))
+        self.assertEqual(len(twelve_months), len(one_month))
+        self.assertEqual(self.member.dues.in_year(2025).count(), 12)
+
+    def test_allocate_payment_is_one_transaction(self):
+        with mock.patch.object(DuesCoverage.objects, 'refresh_many', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                allocate_payment(self.member, Decimal('30.00'), datetime.date(2024, 1, 1))
+        self.assertFalse(Dues.objects.exists())
+        self.assertEqual(FundLedger.objects.total_balance(), Decimal('0.00'))
+
+
+class ReceiptNumberTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+
+    def test_receipt_format(self):
+        dues = Dues.objects.create(member=self.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 3, 7))
+        self.assertRegex(dues.receipt_number, r'^RCPT-20240307-\d{10}$')
+
+    def test_numbers_are_gap_free_and_unique_across_single_and_bulk_creates(self):
+        Dues.objects.create(member=self.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 1, 5))
+        allocate_payment(self.member, Decimal('30.00'), datetime.date(2024, 2, 5))
+        Dues.objects.create(member=self.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 6, 5))
+        numbers = Dues.allocate_receipt_numbers([datetime.date(2024, 7, 1), datetime.date(2024, 7, 2)])
+
+        receipts = list(Dues.objects.order_by('pk').values_list('receipt_number', flat=True)) + numbers
+        sequence_numbers = [int(receipt.rsplit('-', 1)[1]) for receipt in receipts]
+        self.assertEqual(sequence_numbers, list(range(1, 8)))
+        self.assertEqual(len(set(receipts)), len(receipts))
+        self.assertEqual(ReceiptSequence.objects.get(name=Dues.RECEIPT_SEQUENCE).last_value, 7)
+
+
+class DuesCoverageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+        cls.other = CustomUser.objects.create_user(email='other@example.com', password='testing123')
+
+    def coverage(self, member):
+        return {
+            (year, month): (total, count, last_date)
+            for year, month, total, count, last_date in DuesCoverage.objects.filter(member=member).values_list(
+                'year', 'month', 'total_amount', 'payment_count', 'last_payment_date'
+            )
+        }
+
+    def pay(self, amount, date, member=None):
+        return Dues.objects.create(member=member or self.member, amount=Decimal(amount), payment_date=date)
+
+    def test_follows_creates(self):
+        self.pay('4.00', datetime.date(2024, 1, 5))
+        self.pay('6.00', datetime.date(2024, 1, 20))
+        self.assertEqual(self.coverage(self.member), {(2024, 1): (Decimal('10.00'), 2, datetime.date(2024, 1, 20))})
+
+    def test_follows_edits(self):
+        self.pay('4.00', datetime.date(2024, 1, 5))
+        dues = self.pay('6.00', datetime.date(2024, 1, 20))
+
+        dues.amount = Decimal('3.00')
+        dues.save()
+        self.assertEqual(self.coverage(self.member), {(2024, 1): (Decimal('7.00'), 2, datetime.date(2024, 1, 20))})
+
+        dues.payment_date = datetime.date(2024, 2, 2)
+        dues.save()
+        self.assertEqual(self.coverage(self.member), {
+            (2024, 1): (Decimal('4.00'), 1, datetime.date(2024, 1, 5)),
+            (2024, 2): (Decimal('3.00'), 1, datetime.date(2024, 2, 2)),
+        })
+
+        dues.member = self.other
+        dues.save()
+        self.assertEqual(self.coverage(self.member), {(2024, 1): (Decimal('4.00'), 1, datetime.date(2024, 1, 5))})
+        self.assertEqual(self.coverage(self.other), {(2024, 2): (Decimal('3.00'), 1, datetime.date(2024, 2, 2))})
+
+    def test_follows_deletes(self):
+        first = self.pay('4.00', datetime.date(2024, 1, 5))
+        self.pay('6.00', datetime.date(2024, 1, 20)).delete()
+        self.assertEqual(self.coverage(self.member), {(2024, 1): (Decimal('4.00'), 1, datetime.date(2024, 1, 5))})
+        first.delete()
+        self.assertEqual(self.coverage(self.member), {})
+
+    def test_upsert_without_a_conflict_target(self):
+        # MySQL cannot name the conflict target, and Django refuses unique_fields there.
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            self.pay('4.00', datetime.date(2024, 1, 5))
+        self.assertEqual(self.coverage(self.member), {(2024, 1): (Decimal('4.00'), 1, datetime.date(2024, 1, 5))})
+
+    def test_refresh_many(self):
+        Dues.objects.bulk_create([
+            Dues(member=self.member, amount=Decimal('5.00'), payment_date=datetime.date(2024, 1, 5), receipt_number='RCPT-A'),
+            Dues(member=self.member, amount=Decimal('5.00'), payment_date=datetime.date(2024, 3, 5), receipt_number='RCPT-B'),
+            Dues(member=self.other, amount=Decimal('8.00'), payment_date=datetime.date(2024, 2, 5), receipt_number='RCPT-C'),
+        ])
+        DuesCoverage.objects.create(member=self.other, year=2024, month=4, total_amount=Decimal('1.00'), last_payment_date=datetime.date(2024, 4, 1))
+
+        with self.assertNumQueries(3):  # read dues, delete emptied months, upsert
+            DuesCoverage.objects.refresh_many({self.member.pk: [(2024, 1)], self.other.pk: [(2024, 2), (2024, 4)]})
+        self.assertEqual(set(self.coverage(self.member)), {(2024, 1)})
+        self.assertEqual(set(self.coverage(self.other)), {(2024, 2)})
+
+    def test_month_totals_and_outstanding_members(self):
+        self.pay('4.00', datetime.date(2023, 12, 5))
+        self.pay('10.00', datetime.date(2024, 1, 5))
+        self.pay('2.00', datetime.date(2024, 2, 5))
+        self.assertEqual(DuesCoverage.objects.month_totals([self.member.pk, self.other.pk], datetime.date(2024, 1, 31)), {
+            self.member.pk: {(2024, 1): Decimal('10.00'), (2024, 2): Decimal('2.00')},
+            self.other.pk: {},
+        })
+        self.assertQuerySetEqual(DuesCoverage.objects.outstanding_members(2024, 1), [self.other], ordered=False)
+
+        Dues.objects.filter(member=self.member).in_month(datetime.date(2024, 1, 1)).get().delete()
+        self.assertQuerySetEqual(DuesCoverage.objects.outstanding_members(2024, 1), [self.member, self.other], ordered=False)
+
+
+class PaymentImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123', phone_number='0241234567')
+        cls.other = CustomUser.objects.create_user(email='other@example.com', password='testing123', phone_number='0209999999')
+        cls.twin = CustomUser.objects.create_user(email='twin@example.com', password='testing123', phone_number='020 999 9999')
+        cls.member.refresh_from_db()
+
+    def row(self, amount='10.00', payment_date='2024-01-05', **fields):
+        return {'staff_id': self.member.staff_id, 'amount': amount, 'payment_date': payment_date, **fields}
+
+    def test_dry_run_writes_nothing(self):
+        result = import_payments([self.row('25.00')], dry_run=True)
+        self.assertEqual((result.rows_read, result.rows_accepted, result.dues_created), (1, 1, 3))
+        self.assertEqual(result.amount_total, Decimal('25.00'))
+        self.assertFalse(Dues.objects.exists())
+        self.assertFalse(FundLedger.objects.exists())
+
+    def test_commit_writes_dues_and_summaries(self):
+        rows = [self.row('25.00'), self.row('5.00', '05/01/2024', staff_id='', phone_number='+233 24 123 4567')]
+        result = import_payments(rows, batch_size=2)
+        self.assertEqual((result.rows_accepted, result.dues_created, len(result.batches)), (2, 4, 2))
+        self.assertEqual(FundLedger.objects.total_balance(), Decimal('30.00'))
+        totals = DuesCoverage.objects.month_totals([self.member.pk], datetime.date(2024, 1, 1))[self.member.pk]
+        self.assertEqual(totals, {(2024, 1): Decimal('10.00'), (2024, 2): Decimal('10.00'), (2024, 3): Decimal('10.00')})
+
+    def test_repeated_staff_id_shares_the_monthly_cap(self):
+        result = import_payments([self.row('10.00'), self.row('10.00', staff_id=self.member.staff_id.lower())])
+        self.assertEqual(result.rows_accepted, 2)
+        self.assertEqual(
+            list(self.member.dues.order_by('payment_date').values_list('payment_date', 'amount')),
+            [(datetime.date(2024, 1, 5), Decimal('10.00')), (datetime.date(2024, 2, 1), Decimal('10.00'))],
+        )
+
+    def test_rejected_rows_are_reported_by_line(self):
+        rows = [
+            self.row(staff_id='TWA-00-00'),
+            self.row(staff_id='', phone_number='0209999999'),
+            self.row(staff_id=''),
+            self.row('NaN'),
+            self.row('Infinity'),
+            self.row('1e3'),
+            self.row('-5.00'),
+            self.row('0'),
+            self.row('10.001'),
+            self.row(str(MAX_IMPORT_AMOUNT + 1)),
+            self.row(payment_date='2024-13-01'),
+            self.row(f'{MAX_IMPORT_AMOUNT:,}'),
+        ]
+        result = import_payments(rows)
+        self.assertEqual(result.rows_read, 12)
+        self.assertEqual(result.rows_accepted, 1)
+        self.assertEqual([line for line, _ in result.rejected], list(range(2, 13)))
+        reasons = dict(result.rejected)
+        self.assertIn('No member with staff ID', reasons[2])
+        self.assertIn('more than one member', reasons[3])
+        self.assertIn('neither a staff ID nor a phone number', reasons[4])
+        self.assertEqual(reasons[5], "Invalid amount 'NaN'.")
+        self.assertEqual(reasons[7], "Invalid amount '1e3'.")
+        self.assertIn('greater than zero', reasons[9])
+        self.assertIn('allowed for a single payment', reasons[11])
+        self.assertIn('Invalid payment date', reasons[12])
+        self.assertEqual(self.member.dues.count(), 60)
+
+    def test_view_reports_bad_rows(self):
+        self.client.force_login(self.member)
+        upload = SimpleUploadedFile(
+            'payments.csv',
+            f'staff_id,amount,payment_date\n{self.member.staff_id},NaN,2024-01-05\n{self.member.staff_id},10,2024-01-05\n'.encode(),
+            content_type='text/csv',
+        )
+        response = self.client.post(reverse('finance:import_dues'), {'csv_file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].rejected, [(2, "Invalid amount 'NaN'.")])
+        self.assertEqual(self.member.dues.count(), 1)
+
+    def test_windows_encoded_file_is_read(self):
+        self.client.force_login(self.member)
+        upload = SimpleUploadedFile(
+            'payments.csv',
+            f'staff_id,amount,payment_date,notes\n{self.member.staff_id},10,2024-01-05,Paid by Adjoa Asamoah-Békoé\n'.encode('cp1252'),
+            content_type='text/csv',
+        )
+        response = self.client.post(reverse('finance:import_dues'), {'csv_file': upload, 'dry_run': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].rows_accepted, 1)
+        self.assertEqual(self.member.dues.get().notes, 'Paid by Adjoa Asamoah-Békoé')
+
+    def test_unreadable_file_is_reported(self):
+        self.client.force_login(self.member)
+        # Bytes that are neither UTF-8 nor cp1252, and a field past the csv module's size limit.
+        for content in (b'\x81\x8d\x8f\x90\x9d', b'staff_id\n' + b'x' * (csv.field_size_limit() + 1)):
+            with self.subTest(content=content[:20]):
+                upload = SimpleUploadedFile('payments.csv', content, content_type='text/csv')
+                response = self.client.post(reverse('finance:import_dues'), {'csv_file': upload})
+                self.assertEqual(response.status_code, 200)
+                self.assertIsNone(response.context['result'])
+                self.assertTrue(response.context['form'].has_error('csv_file'))
+
+    def test_command_reports_unreadable_file(self):
+        with tempfile.NamedTemporaryFile(suffix='.csv') as csv_file:
+            csv_file.write(b'\x81\x8d\x8f\x90\x9d')
+            csv_file.flush()
+            with self.assertRaisesMessage(CommandError, 'not a text CSV file'):
+                call_command('import_dues', csv_file.name, stdout=io.StringIO())
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=1024)
+    def test_view_rejects_oversized_file(self):
+        self.client.force_login(self.member)
+        rows = ''.join(f'{self.member.staff_id},10,2024-01-05\n' for _ in range(100))
+        upload = SimpleUploadedFile('payments.csv', f'staff_id,amount,payment_date\n{rows}'.encode(), content_type='text/csv')
+        response = self.client.post(reverse('finance:import_dues'), {'csv_file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('csv_file', 'file_too_large'))
+        self.assertFalse(Dues.objects.exists())
+
+
+class FinancialReportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(
+            email='member@example.com', password='testing123', first_name='Ama', last_name='Mensah'
+        )
+        for month in (1, 2, 3):
+            Dues.objects.create(member=cls.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, month, 5))
+        Dues.objects.create(member=cls.member, amount=Decimal('10.00'), payment_date=datetime.date(2023, 12, 5))
+
+        submitted = datetime.datetime(2024, 6, 1, tzinfo=datetime.timezone.utc)
+        Benefit.objects.create(member=cls.member, benefit_type='Birth', detail='-', date_submitted=submitted)
+        Benefit.objects.create(member=cls.member, benefit_type='Funeral', detail='-', date_submitted=submitted, status='Denied')
+        Benefit.objects.create(
+            member=cls.member, benefit_type='Marriage', detail='-', date_submitted=submitted,
+            status='Approved', honoured=True, amount=Decimal('500.00'),
+        )
+
+    def test_report_figures(self):
+        report = build_financial_report(2024)
+        self.assertEqual(report['total_fund_balance'], Decimal('40.00'))
+        self.assertEqual(report['yearly_total_contributions'], Decimal('30.00'))
+        self.assertEqual(report['available_years'], [2024, 2023])
+        self.assertEqual([item['month'].month for item in report['monthly_breakdown']], [1, 2, 3])
+        self.assertEqual(report['total_benefits'], 3)
+        self.assertEqual(report['pending_benefits'], 1)
+        self.assertEqual(report['approved_benefits'], 1)
+        self.assertEqual(report['denied_benefits'], 1)
+        self.assertEqual(report['honoured_benefits'], 1)
+        self.assertEqual(report['total_amount_honoured'], Decimal('500.00'))
+        self.assertEqual(report['net_for_year'], Decimal('-470.00'))
+
+    def test_period_filters(self):
+        self.assertEqual(Dues.objects.in_year(2024).count(), 3)
+        self.assertEqual(Dues.objects.in_year(2023).count(), 1)
+        self.assertEqual(Dues.objects.in_month(datetime.date(2023, 12, 31)).count(), 1)
+        self.assertEqual(self.member.dues.in_month(datetime.date(2024, 2, 29)).count(), 1)
+        self.assertEqual(Benefit.objects.in_year(2024).count(), 3)
+        self.assertEqual(Benefit.objects.in_year(2023).count(), 0)
+
+    def test_report_query_count(self):
+        # Ledger, member count, top contributors, benefit metrics, benefit breakdown.
+        with self.assertNumQueries(5):
+            build_financial_report(2024)
+
+    def test_report_views_query_count(self):
+        self.client.force_login(self.member)
+        for url in (reverse('finance:finance_report'), reverse('chairperson:financial_report')):
+            # The report queries plus the session and user lookups.
+            with self.subTest(url=url), self.assertNumQueries(7):
+                response = self.client.get(url, {'year': 2024})
+                self.assertEqual(response.status_code, 200)
+
+
+class CursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+        # Seven payments, four of them on the same day, so pages split rows with equal dates.
+        dates = [datetime.date(2024, 3, 1)] * 4 + [datetime.date(2024, 2, 1), datetime.date(2024, 1, 1), datetime.date(2024, 1, 1)]
+        Dues.objects.bulk_create([
+            Dues(member=cls.member, amount=Decimal('1.00'), payment_date=date, receipt_number=f'RCPT-{index}')
+            for index, date in enumerate(dates)
+        ])
+        for index in range(5):
+            CustomUser.objects.create_user(email=f'ama{index}@example.com', password='testing123', first_name='Ama', last_name='Mensah')
+
+    def paginator(self, **kwargs):
+        return CursorPaginator(Dues.objects.all(), DUES_ORDERING, 3, **kwargs)
+
+    def expected(self):
+        return list(Dues.objects.order_by('-payment_date', '-pk').values_list('pk', flat=True))
+
+    def walk_forward(self, paginator):
+        pages = [paginator.get_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.get_page(pages[-1].next_token))
+        return pages
+
+    def test_next_pages_cover_every_row_once(self):
+        pages = self.walk_forward(self.paginator())
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([dues.pk for page in pages for dues in page], self.expected())
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(all(page.has_previous() for page in pages[1:]))
+
+    def test_previous_pages_retrace_the_next_pages(self):
+        paginator = self.paginator()
+        pages = self.walk_forward(paginator)
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = paginator.get_page(page.previous_token)
+            self.assertEqual([dues.pk for dues in page], [dues.pk for dues in expected])
+            self.assertTrue(page.has_next())
+        self.assertFalse(page.has_previous())
+
+    def test_equal_sort_keys_across_pages(self):
+        paginator = CursorPaginator(CustomUser.objects.filter(last_name='Mensah'), MEMBER_ORDERING, 2)
+        pages = self.walk_forward(paginator)
+        self.assertEqual(
+            [member.pk for page in pages for member in page],
+            list(CustomUser.objects.filter(last_name='Mensah').order_by('pk').values_list('pk', flat=True)),
+        )
+
+    def test_token_round_trip(self):
+        paginator = self.paginator()
+        dues = Dues.objects.order_by('-payment_date', '-pk')[2]
+        token = paginator.encode('next', dues)
+        self.assertEqual(paginator.decode(token), ('next', [dues.payment_date, dues.pk]))
+
+    def test_invalid_tokens_fall_back_to_the_first_page(self):
+        paginator = self.paginator()
+        first_page = [dues.pk for dues in paginator.get_page()]
+        token = paginator.get_page().next_token
+        tokens = [
+            'garbage',
+            token[:-2] + ('AA' if not token.endswith('AA') else 'BB'),
+            signing.dumps(['sideways', ['2024-03-01', '1']], salt=CURSOR_SALT),
+            signing.dumps(['next', ['2024-03-01']], salt=CURSOR_SALT),
+            signing.dumps(['next', ['not a date', '1']], salt=CURSOR_SALT),
+            signing.dumps(['next', ['2024-03-01', '1']], salt='another.salt'),
+        ]
+        for token in tokens:
+            with self.subTest(token=token):
+                self.assertEqual(paginator.decode(token), (None, None))
+                self.assertEqual([dues.pk for dues in paginator.get_page(token)], first_page)
+
+    def test_total(self):
+        self.assertIsNone(self.paginator().get_page().approximate_total)
+        self.assertEqual(self.paginator(with_total=True).get_page().approximate_total, 7)
+
+    def test_views_follow_cursor_tokens(self):
+        Dues.objects.bulk_create([
+            Dues(member=self.member, amount=Decimal('1.00'), payment_date=datetime.date(2023, 12, 1), receipt_number=f'RCPT-OLD-{index}')
+            for index in range(10)
+        ])
+        self.client.force_login(self.member)
+        url = reverse('finance:finance_member_detail', args=[self.member.pk])
+        first = self.client.get(url).context['dues_history']
+        second = self.client.get(url, {'cursor': first.next_token}).context['dues_history']
+        self.assertEqual([dues.pk for dues in first] + [dues.pk for dues in second], self.expected())
+        self.assertFalse(second.has_next())
+
+        response = self.client.get(reverse('fund_details'), {'cursor': 'tampered'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['dues_history']), 12)
+        self.assertEqual(response.context['dues_history'].approximate_total, 17)
+        self.assertFalse(response.context['dues_history'].has_previous())
+
+
+class CachedFragmentTests(TestCase):
+    """
+    The dashboard and report fragments are cached under the data version, so
+    each kind of write must show up on the next render.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.treasurer = CustomUser.objects.create_superuser(email='treasurer@example.com', password='testing123')
+        cls.member = CustomUser.objects.create_user(
+            email='member@example.com', password='testing123', first_name='Kwame', last_name='Owusu'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.treasurer)
+
+    def dashboard(self):
+        return self.client.get(reverse('finance:finance_dashboard')).content.decode()
+
+    def write(self, action):
+        """Runs `action` and the on-commit version bump, and checks the version moved."""
+        version = get_dashboard_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            result = action()
+        self.assertGreater(get_dashboard_version(), version)
+        return result
+
+    def test_dues_write_refreshes_the_dashboard(self):
+        self.assertIn('No recent activities found.', self.dashboard())
+        self.assertIn('Kwame Owusu', self.dashboard())
+        self.write(lambda: Dues.objects.create(member=self.member, amount=Decimal('7.50'), payment_date=timezone.localdate()))
+        page = self.dashboard()
+        self.assertNotIn('No recent activities found.', page)
+        self.assertIn('+ GH₵ 7.50', page)
+        self.assertIn('All members are up-to-date for this month.', page)
+
+    def test_benefit_write_refreshes_the_dashboard(self):
+        self.assertIn('No pending benefit requests.', self.dashboard())
+        benefit = self.write(lambda: Benefit.objects.create(member=self.member, benefit_type='Birth', detail='-'))
+        self.assertIn('Requested: Birth', self.dashboard())
+        benefit.status = 'Approved'
+        self.write(benefit.save)
+        self.assertIn('No pending benefit requests.', self.dashboard())
+
+    def test_user_write_refreshes_the_dashboard(self):
+        self.assertNotIn('Esi Asante', self.dashboard())
+        self.write(lambda: CustomUser.objects.create_user(
+            email='esi@example.com', password='testing123', first_name='Esi', last_name='Asante'
+        ))
+        self.assertIn('Esi Asante', self.dashboard())
+
+    def test_announcement_write_bumps_the_version(self):
+        self.write(lambda: Announcement.objects.create(title='AGM', content='-', author=self.treasurer))
+
+    def test_benefit_write_refreshes_the_report(self):
+        url = reverse('finance:finance_report')
+        year = timezone.localdate().year
+        self.assertNotIn('GH₵ 450.00', self.client.get(url, {'year': year}).content.decode())
+        self.write(lambda: Benefit.objects.create(
+            member=self.member, benefit_type='Marriage', detail='-', status='Approved', honoured=True, amount=Decimal('450.00'),
+        ))
+        self.assertIn('GH₵ 450.00', self.client.get(url, {'year': year}).content.decode())
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(
+            email='member@example.com', password='testing123', first_name='=HYPERLINK("http://x")', last_name='Mensah'
+        )
+        Dues.objects.create(member=cls.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 1, 5), notes='@SUM(A1)')
+        Dues.objects.create(member=cls.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 2, 5), notes='-1+1')
+        Dues.objects.create(member=cls.member, amount=Decimal('10.00'), payment_date=datetime.date(2023, 2, 5), notes='Cash')
+
+    def export(self, url, **params):
+        self.client.force_login(self.member)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_dues_export(self):
+        rows = self.export(reverse('finance:export_dues'), year=2024)
+        self.assertEqual(rows[0][:3], ['Receipt Number', 'Payment Date', 'Staff ID'])
+        self.assertEqual(len(rows), 3)
+        self.assertEqual([row[3] for row in rows[1:]], ["'=HYPERLINK(\"http://x\")"] * 2)
+        self.assertEqual([row[6] for row in rows[1:]], ["'@SUM(A1)", "'-1+1"])
+        self.assertEqual(rows[1][5], '10.00')
+
+    def test_members_export(self):
+        rows = self.export(reverse('chairperson:export_members'))
+        self.assertEqual(rows[0][:2], ['Staff ID', 'First Name'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(rows[1][3], 'Mensah')
+
+
+
+class ArrearsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+        CustomUser.objects.filter(pk=cls.member.pk).update(
+            date_joined=datetime.datetime(2024, 1, 15, tzinfo=datetime.timezone.utc)
+        )
+        cls.member.refresh_from_db()
+        # January and February paid in full, March only in part, June in advance.
+        for month, amount in ((1, '10.00'), (2, '10.00'), (3, '5.00'), (6, '10.00')):
+            Dues.objects.create(member=cls.member, amount=Decimal(amount), payment_date=datetime.date(2024, month, 5))
+
+    def setUp(self):
+        # Cache invalidation waits for a commit that never comes inside a test,
+        # and other tests reuse the same primary keys.
+        cache.clear()
+
+    def test_arrears_figures(self):
+        arrears = compute_arrears([self.member], today=datetime.date(2024, 4, 20))[self.member.pk]
+        self.assertEqual(arrears.months_owed, 4)
+        self.assertEqual(arrears.months_covered, 2)
+        self.assertEqual(arrears.months_behind, 2)
+        self.assertEqual(arrears.total_paid, Decimal('35.00'))
+        self.assertEqual(arrears.balance, Decimal('-5.00'))
+
+    def test_cached_arrears_follow_new_payments(self):
+        before = cached_arrears([self.member])[self.member.pk]
+        with self.assertNumQueries(0):
+            cached_arrears([self.member])
+        # The cache is only invalidated once the write commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            Dues.objects.create(member=self.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 4, 5))
+            self.assertEqual(cached_arrears([self.member])[self.member.pk], before)
+        after = cached_arrears([self.member])[self.member.pk]
+        self.assertEqual(after.total_paid, before.total_paid + Decimal('10.00'))
+
+
+    def test_member_summary(self):
+        summary = build_member_summary(self.member, today=datetime.date(2024, 3, 20))
+        self.assertEqual(summary.total_contribution, Decimal('35.00'))
+        self.assertTrue(summary.has_paid_this_month)
+        self.assertEqual(summary.arrears, compute_arrears([self.member], today=datetime.date(2024, 3, 20))[self.member.pk])
+        self.assertEqual([payment.payment_date.month for payment in summary.recent_payments], [6, 3, 2, 1])
+
+    def test_member_summary_cache(self):
+        with self.assertNumQueries(2):
+            before = member_summary(self.member)
+        with self.assertNumQueries(0):
+            member_summary(self.member)
+        with self.captureOnCommitCallbacks(execute=True):
+            Dues.objects.create(member=self.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 4, 5))
+            self.assertEqual(member_summary(self.member), before)
+        after = member_summary(self.member)
+        self.assertEqual(after.total_contribution, before.total_contribution + Decimal('10.00'))
+
+
+@skipUnlessDBFeature('supports_partial_indexes')
+class IndexUsageTests(TestCase):
+    """
+    Checks with EXPLAIN that the dashboard and list queries are served by the
+    indexes declared on Dues, Benefit and CustomUser.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+        Dues.objects.create(member=cls.member, amount=Decimal('10.00'), payment_date=datetime.date(2024, 1, 5))
+        Benefit.objects.create(member=cls.member, benefit_type='Birth', detail='-')
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            # The test tables are tiny, so make the planner prefer any usable index.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_dues_indexes(self):
+        self.assertUsesIndex(Dues.objects.order_by('-payment_date')[:5], 'dues_payment_date_idx')
+        self.assertUsesIndex(Dues.objects.filter(member=self.member).order_by('-payment_date'), 'dues_member_date_idx')
+        self.assertUsesIndex(Dues.objects.in_year(2024), 'dues_payment_date_idx')
+        self.assertUsesIndex(Dues.objects.in_month(datetime.date(2024, 1, 20)), 'dues_payment_date_idx')
+
+    def test_benefit_indexes(self):
+        self.assertUsesIndex(Benefit.objects.filter(status='Approved').order_by('-date_submitted'), 'benefit_status_date_idx')
+        self.assertUsesIndex(Benefit.objects.filter(member=self.member).order_by('-date_submitted'), 'benefit_member_date_idx')
+        pending = Benefit.objects.filter(status='Pending').order_by('-date_submitted')
+        self.assertRegex(pending.explain(), 'benefit_pending_idx|benefit_status_date_idx')
+        self.assertUsesIndex(Benefit.objects.in_year(2024), 'benefit_date_idx')
+        honoured = Benefit.objects.filter(honoured=True)
+        self.assertUsesIndex(honoured.values('member').distinct(), 'benefit_honoured_idx')
+        self.assertUsesIndex(honoured.values('member').annotate(total=Sum('amount')), 'benefit_honoured_idx')
+
+    def test_member_index(self):
+        active = CustomUser.objects.filter(is_superuser=False, is_active=True)
+        self.assertUsesIndex(active.order_by('last_name', 'first_name'), 'user_active_name_idx')
+        self.assertUsesIndex(CustomUser.objects.order_by('last_name', 'first_name'), 'user_name_idx')
@@ -14,4 +14,8 @@ urlpatterns = [
     path('member/<int:pk>/print/', views.financeMemberStatementPrintView, name='finance_member_statement_print'),
     path('dues/<int:pk>/edit/', views.dues_edit_view, name='dues_edit'),
     path('dues/<int:pk>/delete/', views.dues_delete_view, name='dues_delete'),
+    path('dues/import/', views.importDuesView, name='import_dues'),
+    path('export/dues/', views.exportDuesView, name='export_dues'),
+    path('export/members/', views.exportMembersView, name='export_members'),
+    path('export/benefits/', views.exportBenefitsView, name='export_benefits'),
 ]
\ No newline at end of file
@@ -1,83 +1,78 @@
-import datetime
-import calendar
-from decimal import Decimal
-
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
-from django.core.paginator import Paginator 
-from django.db.models import Q, Value, Sum, Max
-from django.db.models.functions import Concat, TruncMonth
+from django.db.models import Sum
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 
 from accounts.models import CustomUser
+from accounts.search import search_members
 from members.models import Benefit
 from secretary.models import Announcement
-from .models import Dues
-from .forms import DuesPaymentForm, HonourBenefitForm
+from .arrears import attach_arrears
+from .models import Dues, DuesCoverage, FundLedger
+from .forms import DuesImportForm, DuesPaymentForm, HonourBenefitForm
+from .reports import build_financial_report
+from .services import allocate_payment, import_payments, read_import_file
 from utils.messaging import send_sms
+from utils.dashboard_cache import cached_dashboard_metrics, get_dashboard_version
+from utils.pagination import CursorPaginator, DUES_ORDERING, MEMBER_ORDERING
+from utils.exports import benefits_export_response, dues_export_response, members_export_response, parse_export_year
 
-# Create your views here.
-@login_required
-def financeDashboardView(request):
-    # Aggregate total fund balance from all dues payments
-    total_fund_balance = Dues.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+def financeDashboardMetrics(today):
+    """
+    Computes the association-wide figures for the finance dashboard. The
+    result is cached by the dashboard view, so querysets are evaluated here.
+    """
+    # Total fund balance comes from the monthly ledger rather than scanning all dues
+    total_fund_balance = FundLedger.objects.total_balance()
 
     # Count the total number of non-superuser members
     total_members = CustomUser.objects.filter(is_superuser=False, is_active=True).count()
 
     # Get the 5 most recent dues payments as recent activities
-    recent_activities = Dues.objects.select_related('member').order_by('-payment_date')[:5]
+    recent_activities = list(Dues.objects.select_related('member').order_by('-payment_date')[:5])
 
-    # --- Logic for outstanding members ---
-    today = timezone.now().date()
-    current_month_year = today.strftime('%B %Y')
-
-    # Calculate total contributions for the current year
-    yearly_total_contributions = Dues.objects.filter(
-        payment_date__year=today.year
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    # Calculate total contributions for the current month
-    monthly_total_contributions = Dues.objects.filter(
-        payment_date__year=today.year,
-        payment_date__month=today.month
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-    # Get IDs of members who have paid in the current month
-    paid_this_month_ids = Dues.objects.filter(
-        payment_date__year=today.year,
-        payment_date__month=today.month
-    ).values_list('member_id', flat=True).distinct()
-
-    # Get members who have NOT paid this month, and annotate with their last payment date.
-    # The related name from CustomUser to Dues is 'dues' (from member.dues.all()).
-    outstanding_members = CustomUser.objects.filter(
-        is_superuser=False, is_active=True
-    ).exclude(
-        pk__in=paid_this_month_ids
+    # Calculate total contributions for the current year and month
+    yearly_total_contributions = FundLedger.objects.total_for_year(today.year)
+    monthly_total_contributions = FundLedger.objects.total_for_month(today.year, today.month)
+
+    # Members who have NOT paid this month, with their last payment date, both
+    # read from the per-member monthly coverage table.
+    outstanding_members = list(DuesCoverage.objects.outstanding_members(
+        today.year, today.month
     ).annotate(
-        last_payment_date=Max('dues__payment_date')
-    ).order_by('last_name', 'first_name')
+        last_payment_date=DuesCoverage.objects.last_payment_date()
+    ).order_by('last_name', 'first_name'))
 
     # Get pending benefit requests to display as notifications/action items
-    pending_benefits = Benefit.objects.filter(status='Pending').select_related('member').order_by('-pk')
+    pending_benefits = list(Benefit.objects.filter(status='Pending').select_related('member').order_by('-date_submitted'))
 
-    # Get announcements the user hasn't read
-    unread_announcements = Announcement.objects.exclude(read_by=request.user)
-
-    context = {
-        'navbar':True,
+    return {
         'total_fund_balance': total_fund_balance,
         'total_members': total_members,
         'recent_activities': recent_activities,
         'outstanding_members': outstanding_members,
-        'current_month_year': current_month_year,
+        'current_month_year': today.strftime('%B %Y'),
         'yearly_total_contributions': yearly_total_contributions,
         'monthly_total_contributions': monthly_total_contributions,
         'pending_benefits': pending_benefits,
+    }
+
+
+# Create your views here.
+@login_required
+def financeDashboardView(request):
+    # Association-wide figures are shared by every finance user and cached.
+    context = cached_dashboard_metrics('finance', financeDashboardMetrics)
+
+    # Get announcements the user hasn't read
+    unread_announcements = Announcement.objects.unread_by(request.user).select_related('author')
+
+    context = {
+        'navbar': True,
+        **context,
         'unread_announcements': unread_announcements,
     }
     return render(request, 'finance/dashboard.html', context)
@@ -150,7 +145,7 @@ def honourBenefitView(request, pk):
             honoured_benefit.save()
             messages.success(request, f"Benefit for {benefit.member.get_full_name()} has been marked as honoured with an amount of GH₵ {honoured_benefit.amount:,.2f}.")
 
-            # Send SMS notification
+            # Queue the SMS notification; the outbox worker sends it.
             member = honoured_benefit.member
             if member.phone_number:
                 message = f"Dear {member.get_full_name()}, your benefit of GHC{honoured_benefit.amount} has been honoured. Thank you."
@@ -182,53 +177,10 @@ def financeReportView(request):
     except (ValueError, TypeError):
         selected_year = today.year
 
-    # Get a list of all years for which payments exist, for the filter dropdown.
-    payment_dates = Dues.objects.dates('payment_date', 'year', order='DESC')
-    available_years = [date.year for date in payment_dates]
-
-    # Filter dues for the selected year
-    dues_for_year = Dues.objects.filter(payment_date__year=selected_year)
-
-    # --- Key Metrics ---
-    total_fund_balance = Dues.objects.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    yearly_total_contributions = dues_for_year.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-    total_members = CustomUser.objects.filter(is_superuser=False, is_active=True).count()
-    
-    # Calculate average contribution per member for the year
-    average_contribution = (yearly_total_contributions / total_members) if total_members > 0 else Decimal('0.00')
-
-    # --- Monthly Breakdown ---
-    # Group contributions by month for the selected year
-    monthly_breakdown = dues_for_year.annotate(
-        month=TruncMonth('payment_date')
-    ).values(
-        'month'
-    ).annotate(
-        total=Sum('amount')
-    ).order_by('month')
-
-    # --- Top Contributors ---
-    # Get the top 10 contributors for the selected year
-    top_contributors = dues_for_year.values(
-        'member__id', 
-    ).annotate(
-        full_name=Concat('member__first_name', Value(' '), 'member__last_name'),
-        total_paid=Sum('amount')
-    ).order_by('-total_paid')[:10]
-
-    # Net financial position for the year
-    net_for_year = yearly_total_contributions
-
     context = {
         'navbar': True,
-        'selected_year': selected_year,
-        'available_years': available_years,
-        'total_fund_balance': total_fund_balance,
-        'yearly_total_contributions': yearly_total_contributions,
-        'average_contribution': average_contribution,
-        'monthly_breakdown': monthly_breakdown,
-        'top_contributors': top_contributors,
-        'net_for_year': net_for_year,
+        **build_financial_report(selected_year),
+        'data_version': get_dashboard_version(),
     }
     return render(request, 'finance/finance_report.html', context)
 
@@ -237,20 +189,17 @@ def financeReportView(request):
 def financeMembersListView(request):
     # Filter out superusers from the list, as they are not regular members
     # and do not have dues payment history. This prevents confusion.
-    members_list = CustomUser.objects.filter(is_superuser=False, is_active=True).order_by('first_name', 'last_name')
+    members_list = CustomUser.objects.filter(is_superuser=False, is_active=True)
 
     search_query = request.GET.get("q")
     if search_query:
-        members_list = members_list.annotate(
-            full_name=Concat('first_name', Value(' '), 'last_name')
-        ).filter(
-            Q(full_name__icontains=search_query) | Q(staff_id__icontains=search_query)
-        )
+        members_list = search_members(members_list, search_query)
 
-    paginator = Paginator(members_list, 15)  # Show 15 members per page.
-
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    # Keyset pagination keeps deep pages as cheap as the first one.
+    paginator = CursorPaginator(members_list, MEMBER_ORDERING, 15)  # Show 15 members per page.
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    # Arrears for the whole page come from the cache or one set-based pass.
+    page_obj.object_list = attach_arrears(page_obj.object_list)
     context = {
         'page_obj': page_obj,
         'navbar': True,
@@ -262,58 +211,18 @@ def financeMembersListView(request):
 @login_required
 def financeMemberDetailView(request, pk):
     member = get_object_or_404(CustomUser, pk=pk)
-    # Define the maximum amount that can be recorded for a single month.
-    MAX_MONTHLY_PAYMENT = Decimal('10.00')
 
     if request.method == 'POST':
         form = DuesPaymentForm(request.POST)
         if form.is_valid():
-            total_amount_paid = form.cleaned_data['amount']
-            payment_date = form.cleaned_data['payment_date']
-            notes = form.cleaned_data['notes']
-
-            # 1. Check for existing payments in the selected month to "top-up" first.
-            existing_payment_for_month = Dues.objects.filter(
-                member=member,
-                payment_date__year=payment_date.year,
-                payment_date__month=payment_date.month
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-
-            # 2. Calculate how much more can be paid for the selected month.
-            room_in_month = max(Decimal('0.00'), MAX_MONTHLY_PAYMENT - existing_payment_for_month)
-
-            # 3. Determine the amount to apply to the selected month.
-            amount_for_selected_month = min(total_amount_paid, room_in_month)
-
-            # 4. If there's room, create the payment record for the selected month.
-            if amount_for_selected_month > 0:
-                Dues.objects.create(
-                    member=member,
-                    amount=amount_for_selected_month,
-                    payment_date=payment_date,
-                    notes=notes
-                )
-
-            # 5. Calculate the remaining amount to be spread to future months.
-            remaining_amount = total_amount_paid - amount_for_selected_month
-            current_date = payment_date
-
-            # 6. Loop and create new Dues records for subsequent months until the entire amount is allocated.
-            while remaining_amount > 0:
-                # A reliable way to get the first day of the next month.
-                current_date = current_date.replace(day=1) + datetime.timedelta(days=32)
-                next_month_date = current_date.replace(day=1)
-
-                # The amount for this future payment is the lesser of the remaining balance or the monthly max.
-                amount_for_this_month = min(remaining_amount, MAX_MONTHLY_PAYMENT)
-                Dues.objects.create(
-                    member=member,
-                    amount=amount_for_this_month,
-                    payment_date=next_month_date,
-                    notes=f"Carried over from payment on {payment_date.strftime('%Y-%m-%d')}"
-                )
-                remaining_amount -= amount_for_this_month
-                current_date = next_month_date
+            # Top up the selected month first, then spread the remainder across
+            # future months, all in one transaction.
+            allocate_payment(
+                member,
+                form.cleaned_data['amount'],
+                form.cleaned_data['payment_date'],
+                notes=form.cleaned_data['notes'],
+            )
 
             messages.success(request, f"Dues payment for {member.get_full_name()} recorded and spread across future months.")
             return redirect('finance:finance_member_detail', pk=member.pk)
@@ -337,16 +246,15 @@ def financeMemberDetailView(request, pk):
 
     if selected_year_str and selected_year_str.isdigit():
         selected_year = int(selected_year_str)
-        dues_for_display = all_dues_history.filter(payment_date__year=selected_year)
+        dues_for_display = all_dues_history.in_year(selected_year)
 
     # Calculate the total for the displayed period (before pagination) and the grand total
     total_dues = dues_for_display.aggregate(total=Sum('amount'))['total'] or 0.00
     grand_total_dues = all_dues_history.aggregate(total=Sum('amount'))['total'] or 0.00
 
-    # Add pagination to the dues history
-    paginator = Paginator(dues_for_display, 15)  # Show 15 payments per page
-    page_number = request.GET.get('page')
-    dues_page_obj = paginator.get_page(page_number)
+    # Add keyset pagination to the dues history
+    paginator = CursorPaginator(dues_for_display, DUES_ORDERING, 15)  # Show 15 payments per page
+    dues_page_obj = paginator.get_page(request.GET.get('cursor'))
 
     context = {
         'navbar': True,
@@ -362,6 +270,42 @@ def financeMemberDetailView(request, pk):
     return render(request, 'finance/member_detail.html', context)
 
 
+@login_required
+def importDuesView(request):
+    """
+    Uploads a CSV of bank or mobile-money payments and records them in bulk,
+    applying the same monthly spreading rules as the member detail page.
+    """
+    result = None
+    if request.method == 'POST':
+        form = DuesImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                rows = read_import_file(form.cleaned_data['csv_file'])
+            except ValueError as error:
+                form.add_error('csv_file', str(error))
+                messages.error(request, str(error))
+            else:
+                result = import_payments(rows, dry_run=form.cleaned_data['dry_run'])
+                if result.dry_run:
+                    messages.info(request, f"Dry run complete: {result.rows_accepted} of {result.rows_read} rows can be imported.")
+                else:
+                    messages.success(request, f"Imported {result.rows_accepted} payments as {result.dues_created} dues records.")
+        elif form.has_error('csv_file', 'file_too_large'):
+            messages.error(request, form.errors['csv_file'][0])
+        else:
+            messages.error(request, "Please choose a CSV file to import.")
+    else:
+        form = DuesImportForm()
+
+    context = {
+        'navbar': True,
+        'form': form,
+        'result': result,
+    }
+    return render(request, 'finance/import_dues.html', context)
+
+
 @login_required
 def financeMemberStatementPrintView(request, pk):
     member = get_object_or_404(CustomUser, pk=pk)
@@ -412,4 +356,28 @@ def dues_delete_view(request, pk):
         return redirect('finance:finance_member_detail', pk=due.member.pk)
 
     context = {'due': due, 'member': due.member, 'navbar': True}
-    return render(request, 'finance/dues_confirm_delete.html', context)
\ No newline at end of file
+    return render(request, 'finance/dues_confirm_delete.html', context)
+
+
+@login_required
+def exportDuesView(request):
+    """
+    Streams the dues ledger as CSV, optionally filtered by ?year=.
+    """
+    return dues_export_response(parse_export_year(request))
+
+
+@login_required
+def exportMembersView(request):
+    """
+    Streams the member roster as CSV.
+    """
+    return members_export_response()
+
+
+@login_required
+def exportBenefitsView(request):
+    """
+    Streams benefit claims as CSV, optionally filtered by ?year=.
+    """
+    return benefits_export_response(parse_export_year(request))
@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import OutboundSms
 
 # Register your models here.
+@admin.register(OutboundSms)
+class OutboundSmsAdmin(admin.ModelAdmin):
+    list_display = ('to_number', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('to_number', 'body')
+    readonly_fields = ('provider_message_id', 'last_error')
@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from general.models import OutboundSms
+from utils.messaging import get_sms_backend
+
+
+class Command(BaseCommand):
+    help = 'Sends queued SMS messages from the outbox, retrying failures with exponential backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50, help='Messages claimed per batch.')
+        parser.add_argument('--workers', type=int, default=4, help='Messages sent concurrently.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to wait when the outbox is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit once no message is due instead of polling.')
+
+    def deliver(self, backend, pool, batch):
+        """Returns one result per message: the gateway's message ID or the exception raised."""
+        messages = [(sms.to_number, sms.body) for sms in batch]
+        if backend.supports_batch:
+            try:
+                return backend.send_many(messages)
+            except Exception as e:
+                return [e] * len(batch)
+
+        futures = [pool.submit(backend.send, to_number, body) for to_number, body in messages]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def handle(self, *args, **options):
+        for option in ('batch_size', 'workers'):
+            if options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1.")
+        if options['interval'] < 0:
+            raise CommandError('--interval cannot be negative.')
+
+        try:
+            backend = get_sms_backend()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        sent_total = failed_total = 0
+        # Only the gateway calls run in the pool; the database is updated from
+        # this thread once each call has finished.
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = OutboundSms.objects.claim_batch(options['batch_size'])
+                if not batch:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                sent = failed = 0
+                for sms, result in zip(batch, self.deliver(backend, pool, batch)):
+                    if isinstance(result, Exception):
+                        sms.mark_failed(result)
+                        failed += 1
+                    else:
+                        sms.mark_sent(result)
+                        sent += 1
+                sent_total += sent
+                failed_total += failed
+                self.stdout.write(f'Batch of {len(batch)}: {sent} sent, {failed} failed.')
+
+        self.stdout.write(self.style.SUCCESS(f'Outbox drained: {sent_total} sent, {failed_total} failed attempts.'))
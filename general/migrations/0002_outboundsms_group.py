@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('general', '0001_outboundsms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundsms',
+            name='group',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='outboundsms',
+            index=models.Index(fields=['group', 'status'], name='outbound_sms_group_idx'),
+        ),
+    ]
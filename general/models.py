@@ -1,3 +1,119 @@
-from django.db import models
+from datetime import timedelta
 
-# Create your models here.
+from django.db import connection, models, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+
+class OutboundSmsManager(models.Manager):
+    def enqueue(self, to_number, body):
+        """Queues one message for the outbox worker and returns it."""
+        return self.create(to_number=to_number, body=body)
+
+    def enqueue_many(self, messages, group='', not_before=None, batch_size=500):
+        """
+        Queues (to_number, body) pairs with a single bulk insert. `group` tags
+        the rows so their progress can be counted together, and `not_before`
+        holds them back until that time.
+        """
+        not_before = not_before or timezone.now()
+        return self.bulk_create(
+            [
+                self.model(to_number=to_number, body=body, group=group, next_attempt_at=not_before)
+                for to_number, body in messages
+            ],
+            batch_size=batch_size,
+        )
+
+    def status_counts(self, group):
+        """Returns {'pending': n, 'sent': n, 'failed': n} for the messages in `group`."""
+        counts = dict.fromkeys([OutboundSms.STATUS_PENDING, OutboundSms.STATUS_SENT, OutboundSms.STATUS_FAILED], 0)
+        counts.update(self.filter(group=group).order_by().values_list('status').annotate(n=Count('pk')))
+        return counts
+
+    def claim_batch(self, limit, lease_seconds=600):
+        """
+        Claims up to `limit` due messages for sending. Claiming counts as an
+        attempt and pushes next_attempt_at past the lease, so a message held
+        by a worker that dies is picked up again once the lease runs out.
+        Concurrent workers skip each other's locked rows where the database
+        supports it.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            due = self.filter(status=OutboundSms.STATUS_PENDING, next_attempt_at__lte=now).order_by('next_attempt_at', 'pk')
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            ids = list(due.values_list('pk', flat=True)[:limit])
+            if not ids:
+                return []
+            self.filter(pk__in=ids).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=lease_seconds),
+            )
+        return list(self.filter(pk__in=ids).order_by('pk'))
+
+
+class OutboundSms(models.Model):
+    """
+    An SMS waiting to be sent, or the record of one that was. Requests only
+    insert rows here; the `process_sms_outbox` command sends them.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    MAX_ATTEMPTS = 6
+    RETRY_BASE_SECONDS = 30
+    RETRY_MAX_SECONDS = 3600
+
+    to_number = models.CharField(max_length=20)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    provider_message_id = models.CharField(max_length=64, blank=True)
+    # Tags messages queued together, e.g. 'broadcast:12' for an announcement broadcast.
+    group = models.CharField(max_length=50, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutboundSmsManager()
+
+    class Meta:
+        verbose_name = "Outbound SMS"
+        verbose_name_plural = "Outbound SMS"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbound_sms_due_idx'),
+            models.Index(fields=['group', 'status'], name='outbound_sms_group_idx'),
+        ]
+
+    def __str__(self):
+        return f"SMS to {self.to_number} ({self.get_status_display()})"
+
+    def retry_delay(self):
+        """Exponential backoff: 30s, 60s, 120s, ... capped at an hour."""
+        return timedelta(seconds=min(self.RETRY_BASE_SECONDS * 2 ** max(self.attempts - 1, 0), self.RETRY_MAX_SECONDS))
+
+    def mark_sent(self, provider_message_id=''):
+        self.status = self.STATUS_SENT
+        self.provider_message_id = provider_message_id or ''
+        self.sent_at = timezone.now()
+        self.last_error = ''
+        self.save(update_fields=['status', 'provider_message_id', 'sent_at', 'last_error'])
+
+    def mark_failed(self, error):
+        """Schedules a retry, or gives up once MAX_ATTEMPTS have been used."""
+        self.last_error = str(error)
+        if self.attempts >= self.MAX_ATTEMPTS:
+            self.status = self.STATUS_FAILED
+        else:
+            self.next_attempt_at = timezone.now() + self.retry_delay()
+        self.save(update_fields=['status', 'next_attempt_at', 'last_error'])
@@ -1,3 +1,175 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from utils.messaging import get_sms_backend
+from utils.sms_backends import console, filebased, locmem, twilio
+from utils.sms_backends.base import BaseSmsBackend
+from .models import OutboundSms
 
 # Create your tests here.
+
+
+class OutboundSmsTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        patcher = mock.patch.object(timezone, 'now', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def queue(self, count):
+        return OutboundSms.objects.enqueue_many([(f'+23320000000{index}', f'Message {index}') for index in range(count)])
+
+    def test_claim_batch_leases_messages(self):
+        queued = self.queue(3)
+        claimed = OutboundSms.objects.claim_batch(2, lease_seconds=600)
+        self.assertEqual([sms.pk for sms in claimed], [sms.pk for sms in queued[:2]])
+        self.assertEqual([sms.attempts for sms in claimed], [1, 1])
+        self.assertEqual(claimed[0].next_attempt_at, self.now + timedelta(seconds=600))
+
+        # Leased messages are skipped until the lease runs out.
+        self.assertEqual([sms.pk for sms in OutboundSms.objects.claim_batch(5)], [queued[2].pk])
+        self.assertEqual(OutboundSms.objects.claim_batch(5), [])
+
+        self.now += timedelta(seconds=601)
+        reclaimed = OutboundSms.objects.claim_batch(5)
+        self.assertEqual([sms.pk for sms in reclaimed], [sms.pk for sms in queued])
+        self.assertEqual([sms.attempts for sms in reclaimed], [2, 2, 2])
+
+    def test_not_before_holds_messages_back(self):
+        OutboundSms.objects.enqueue_many([('+233200000000', 'Later')], not_before=self.now + timedelta(hours=1))
+        self.assertEqual(OutboundSms.objects.claim_batch(5), [])
+        self.now += timedelta(hours=1)
+        self.assertEqual(len(OutboundSms.objects.claim_batch(5)), 1)
+
+    def test_retry_backoff_schedule(self):
+        sms = self.queue(1)[0]
+        delays = []
+        for _ in range(OutboundSms.MAX_ATTEMPTS - 1):
+            sms = OutboundSms.objects.claim_batch(1)[0]
+            sms.mark_failed(RuntimeError('Gateway timeout'))
+            sms.refresh_from_db()
+            self.assertEqual(sms.status, OutboundSms.STATUS_PENDING)
+            delays.append((sms.next_attempt_at - self.now).total_seconds())
+            self.now = sms.next_attempt_at
+        self.assertEqual(delays, [30, 60, 120, 240, 480])
+        self.assertEqual(sms.last_error, 'Gateway timeout')
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual(OutboundSms(attempts=20).retry_delay(), timedelta(seconds=OutboundSms.RETRY_MAX_SECONDS))
+
+    def test_fails_for_good_after_max_attempts(self):
+        self.queue(1)
+        OutboundSms.objects.update(attempts=OutboundSms.MAX_ATTEMPTS - 1)
+        sms = OutboundSms.objects.claim_batch(1)[0]
+        sms.mark_failed(RuntimeError('Invalid number'))
+        sms.refresh_from_db()
+        self.assertEqual((sms.status, sms.attempts, sms.last_error), (OutboundSms.STATUS_FAILED, OutboundSms.MAX_ATTEMPTS, 'Invalid number'))
+        self.now += timedelta(days=1)
+        self.assertEqual(OutboundSms.objects.claim_batch(5), [])
+
+
+class ProcessSmsOutboxTests(TestCase):
+
+    def setUp(self):
+        locmem.outbox.clear()
+        self.addCleanup(locmem.outbox.clear)
+
+    def run_command(self, *args):
+        stdout = StringIO()
+        call_command('process_sms_outbox', '--once', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_sends_every_due_message(self):
+        OutboundSms.objects.enqueue_many([(f'+23320000000{index}', f'Message {index}') for index in range(5)])
+        output = self.run_command('--batch-size', '2')
+        self.assertIn('Outbox drained: 5 sent, 0 failed attempts.', output)
+        self.assertEqual(len(locmem.outbox), 5)
+        self.assertEqual(OutboundSms.objects.status_counts(''), {'pending': 0, 'sent': 5, 'failed': 0})
+        self.assertTrue(all(sms.provider_message_id.startswith('locmem-') for sms in OutboundSms.objects.all()))
+
+    def test_failed_messages_are_retried_later(self):
+        failing, sending = OutboundSms.objects.enqueue_many([('+233200000000', 'First'), ('+233200000001', 'Second')])
+        with mock.patch.object(locmem.SmsBackend, 'send_many', return_value=[RuntimeError('Gateway down'), 'locmem-x']):
+            output = self.run_command()
+        self.assertIn('1 sent, 1 failed', output)
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts, failing.last_error), (OutboundSms.STATUS_PENDING, 1, 'Gateway down'))
+        self.assertGreater(failing.next_attempt_at, timezone.now())
+        # Not due yet, so a second run has nothing to send.
+        self.assertIn('0 sent, 0 failed', self.run_command())
+
+    def test_rejects_invalid_options(self):
+        for option in ('--workers', '--batch-size'):
+            with self.subTest(option=option), self.assertRaisesMessage(CommandError, f'{option} must be at least 1.'):
+                self.run_command(option, '0')
+
+
+class SmsBackendTests(SimpleTestCase):
+
+    def setUp(self):
+        locmem.outbox.clear()
+        self.addCleanup(locmem.outbox.clear)
+
+    def test_configured_backend(self):
+        self.assertIsInstance(get_sms_backend(), locmem.SmsBackend)
+        self.assertIsInstance(get_sms_backend('utils.sms_backends.console.SmsBackend', stream=StringIO()), console.SmsBackend)
+
+    def test_send_many_reports_each_failure(self):
+        class FlakyBackend(BaseSmsBackend):
+            def send(self, to_number, message):
+                if to_number == 'bad':
+                    raise ValueError('Invalid number')
+                return f'id-{to_number}'
+
+        results = FlakyBackend().send_many([('1', 'a'), ('bad', 'b'), ('2', 'c')])
+        self.assertEqual(results[0::2], ['id-1', 'id-2'])
+        self.assertIsInstance(results[1], ValueError)
+
+    def test_locmem(self):
+        backend = locmem.SmsBackend()
+        message_ids = backend.send_many([('+233200000000', 'Hello'), ('+233200000001', 'Again')])
+        self.assertEqual(len(set(message_ids)), 2)
+        self.assertEqual(locmem.outbox, [('+233200000000', 'Hello'), ('+233200000001', 'Again')])
+
+    def test_console(self):
+        stream = StringIO()
+        message_id = console.SmsBackend(stream=stream).send('+233200000000', 'Meeting at 4pm')
+        self.assertTrue(message_id.startswith('console-'))
+        self.assertIn(f'SMS {message_id} to +233200000000:\nMeeting at 4pm\n', stream.getvalue())
+
+    def test_file(self):
+        handle, path = tempfile.mkstemp(suffix='.log')
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        with override_settings(SMS_FILE_PATH=path):
+            backend = filebased.SmsBackend()
+            first = backend.send('+233200000000', 'First')
+            rest = backend.send_many([('+233200000001', 'Second'), ('+233200000002', 'Third')])
+        with open(path, encoding='utf-8') as log:
+            content = log.read()
+        for message_id, text in zip([first, *rest], ['First', 'Second', 'Third']):
+            self.assertIn(f'SMS {message_id} to', content)
+            self.assertIn(text, content)
+
+    @override_settings(TWILIO_ACCOUNT_SID='AC123', TWILIO_AUTH_TOKEN='secret', TWILIO_PHONE_NUMBER='+15005550006')
+    def test_twilio(self):
+        client = mock.Mock()
+        client.messages.create.return_value.sid = 'SM123'
+        with mock.patch.dict(twilio._clients, {('AC123', 'secret'): client}):
+            self.assertEqual(twilio.SmsBackend().send('+233200000000', 'Hello'), 'SM123')
+        client.messages.create.assert_called_once_with(to='+233200000000', from_='+15005550006', body='Hello')
+
+    @override_settings(TWILIO_ACCOUNT_SID='', TWILIO_AUTH_TOKEN='', TWILIO_PHONE_NUMBER='')
+    def test_twilio_needs_credentials(self):
+        with self.assertRaises(ImproperlyConfigured):
+            twilio.SmsBackend()
@@ -1,9 +1,11 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.template.defaultfilters import filesizeformat
 import re
 
 
 from accounts.models import CustomUser
+from utils.storage import document_max_upload_size
 from .models import Benefit, Children, NextOfKin, Parent, Spouse
 
 
@@ -22,6 +24,12 @@ class BenefitForm(forms.ModelForm):
             "member": forms.HiddenInput(),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["supporting_document"].help_text = (
+            f"Maximum file size: {filesizeformat(document_max_upload_size())}."
+        )
+
 
 class EditProfileForm(forms.ModelForm):
     """A form for users to edit their profile information."""
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:50
+
+import mimetypes
+import posixpath
+
+import utils.storage
+from django.db import migrations, models
+
+
+def record_document_metadata(apps, schema_editor):
+    Benefit = apps.get_model('members', 'Benefit')
+    storage = utils.storage.document_storage()
+
+    benefits = list(Benefit.objects.exclude(supporting_document='').exclude(supporting_document__isnull=True))
+    for benefit in benefits:
+        name = benefit.supporting_document.name
+        benefit.document_name = posixpath.basename(name)[:255]
+        benefit.document_content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        benefit.document_size = storage.size(name) if storage.exists(name) else None
+    Benefit.objects.bulk_update(benefits, ['document_name', 'document_content_type', 'document_size'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0003_benefit_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='benefit',
+            name='document_content_type',
+            field=models.CharField(blank=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='benefit',
+            name='document_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='benefit',
+            name='document_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='benefit',
+            name='supporting_document',
+            field=models.FileField(blank=True, null=True, storage=utils.storage.document_storage, upload_to='supporting_documents', validators=[utils.storage.MaxFileSizeValidator()]),
+        ),
+        migrations.RunPython(record_document_metadata, migrations.RunPython.noop),
+    ]
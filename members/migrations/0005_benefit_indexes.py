@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 16:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0004_benefit_document_metadata'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='benefit',
+            index=models.Index(fields=['status', '-date_submitted'], name='benefit_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='benefit',
+            index=models.Index(fields=['member', '-date_submitted'], name='benefit_member_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='benefit',
+            index=models.Index(condition=models.Q(('status', 'Pending')), fields=['-date_submitted'], name='benefit_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='benefit',
+            index=models.Index(condition=models.Q(('honoured', True)), fields=['member', 'amount'], name='benefit_honoured_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('members', '0005_benefit_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='benefit',
+            index=models.Index(fields=['date_submitted'], name='benefit_date_idx'),
+        ),
+    ]
@@ -1,13 +1,28 @@
+import datetime
+import posixpath
 from decimal import Decimal
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
 from accounts.models import CustomUser
+from utils.storage import MaxFileSizeValidator, document_storage, sniff_content_type
 
 # Create your models here.
 
 
+class BenefitQuerySet(models.QuerySet):
+    """
+    Period filters written as plain ranges on date_submitted, so the date
+    index serves them instead of extracting the year from every row.
+    """
+    def in_year(self, year):
+        """Requests submitted in `year`, in the current time zone like a __year lookup."""
+        start = timezone.make_aware(datetime.datetime(year, 1, 1))
+        end = timezone.make_aware(datetime.datetime(year + 1, 1, 1))
+        return self.filter(date_submitted__gte=start, date_submitted__lt=end)
+
+
 class Benefit(models.Model):
     """
     Represents a benefit claim made by a member.
@@ -38,7 +53,15 @@ class Benefit(models.Model):
     benefit_type = models.CharField(max_length=30, choices=BENEFIT_CHOICES)
     amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text="The amount to be paid for this benefit.")
     detail = models.TextField()
-    supporting_document = models.FileField(upload_to='supporting_documents', blank=True, null=True)
+    supporting_document = models.FileField(
+        upload_to='supporting_documents', storage=document_storage, blank=True, null=True,
+        validators=[MaxFileSizeValidator()],
+    )
+    # Recorded at upload so listings never have to open the stored file,
+    # which is named after its content hash.
+    document_name = models.CharField(max_length=255, blank=True, editable=False)
+    document_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    document_content_type = models.CharField(max_length=100, blank=True, editable=False)
     member = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='benefits')
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
@@ -56,11 +79,35 @@ class Benefit(models.Model):
     processed_date = models.DateTimeField(null=True, blank=True)
     reason = models.TextField(blank=True, null=True)
 
+    objects = BenefitQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Benefit"
         verbose_name_plural = "Benefits"
+        indexes = [
+            # Benefit lists filtered by status and a member's own requests, newest first.
+            models.Index(fields=['status', '-date_submitted'], name='benefit_status_date_idx'),
+            models.Index(fields=['member', '-date_submitted'], name='benefit_member_date_idx'),
+            # Yearly report figures and exports across all members.
+            models.Index(fields=['date_submitted'], name='benefit_date_idx'),
+            # Partial indexes for the dashboards: the small pending queue, and the
+            # honoured payouts summed per member. Backends without partial index
+            # support (MySQL) skip these and use the status index above.
+            models.Index(fields=['-date_submitted'], condition=models.Q(status='Pending'), name='benefit_pending_idx'),
+            models.Index(fields=['member', 'amount'], condition=models.Q(honoured=True), name='benefit_honoured_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        document = self.supporting_document
+        if not document:
+            self.document_name, self.document_size, self.document_content_type = '', None, ''
+        elif not document._committed:
+            # A new upload: record its details before storage renames it to its hash.
+            self.document_name = posixpath.basename(document.name)[:255]
+            self.document_size = document.size
+            self.document_content_type = sniff_content_type(document, document.name)
+        super().save(*args, **kwargs)
 
-    
 
     def __str__(self):
         """
@@ -1,3 +1,80 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from utils.storage import sniff_content_type
+from .models import Benefit
 
 # Create your tests here.
+
+PDF_BYTES = b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n1 0 obj\n<<>>\nendobj\n'
+
+
+class SniffContentTypeTests(SimpleTestCase):
+
+    def test_type_comes_from_the_content(self):
+        self.assertEqual(sniff_content_type(BytesIO(PDF_BYTES), 'certificate.html'), 'application/pdf')
+        self.assertEqual(sniff_content_type(BytesIO(b'\xff\xd8\xff\xe0\x00\x10JFIF'), 'photo.pdf'), 'image/jpeg')
+        self.assertEqual(sniff_content_type(BytesIO(b'RIFF\x10\x00\x00\x00WEBPVP8 '), 'photo'), 'image/webp')
+        self.assertEqual(sniff_content_type(BytesIO(b'<script>alert(1)</script>'), 'note.pdf'), 'application/octet-stream')
+
+    def test_extension_only_picks_among_formats_sharing_a_container(self):
+        zipped = b'PK\x03\x04\x14\x00\x06\x00'
+        self.assertEqual(
+            sniff_content_type(BytesIO(zipped), 'letter.docx'),
+            'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        )
+        self.assertEqual(sniff_content_type(BytesIO(zipped), 'letter.html'), 'application/zip')
+
+    def test_position_is_restored(self):
+        content = BytesIO(PDF_BYTES)
+        content.seek(3)
+        sniff_content_type(content)
+        self.assertEqual(content.tell(), 3)
+
+
+class BenefitDocumentUploadTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.member)
+
+    def submit(self, name, content):
+        # The file goes first, so the fields after it show whether parsing carried on past it.
+        return self.client.post(reverse('benefit'), {
+            'supporting_document': SimpleUploadedFile(name, content, content_type='text/html'),
+            'benefit_type': 'Birth',
+            'detail': 'Birth of our daughter.',
+            'member': self.member.pk,
+        })
+
+    def test_stored_type_and_extension_follow_the_content(self):
+        response = self.submit('certificate.html', PDF_BYTES)
+        self.assertRedirects(response, reverse('benefit_list'), fetch_redirect_response=False)
+        benefit = Benefit.objects.get()
+        self.assertEqual(benefit.document_name, 'certificate.html')
+        self.assertEqual(benefit.document_content_type, 'application/pdf')
+        self.assertTrue(benefit.supporting_document.name.endswith('.pdf'))
+
+    @override_settings(FILE_UPLOAD_MAX_SIZE=1024)
+    def test_oversized_upload_is_skipped_and_reported(self):
+        response = self.submit('certificate.pdf', PDF_BYTES + b'0' * 4096)
+        self.assertEqual(response.status_code, 200)
+        form = response.context['form']
+        self.assertTrue(form.has_error('supporting_document', 'file_too_large'))
+        self.assertEqual(list(form.errors), ['supporting_document'])
+        self.assertEqual(form.data['detail'], 'Birth of our daughter.')
+        self.assertFalse(Benefit.objects.exists())
@@ -1,14 +1,16 @@
 from django.shortcuts import get_object_or_404, redirect, render
 from django.db.models import Sum
 from django.core.paginator import Paginator
-from django.utils import timezone
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 
 from .forms import BenefitForm, ChildrenForm, EditProfileForm, NextOfKinForm, ParentForm, ProfilePictureForm, SpouseForm
 from .models import Benefit, Children, NextOfKin, Parent, Spouse
 from finance.models import Dues
+from finance.summary import member_summary
+from accounts.images import schedule_thumbnails
 from secretary.models import Announcement
+from utils.pagination import CursorPaginator, DUES_ORDERING
 
 
 # Create your views here.
@@ -16,36 +18,28 @@ from secretary.models import Announcement
 def dashboardView(request):
     member = request.user
 
-    # Calculate the member's total contribution from all their dues payments.
-    total_contribution = Dues.objects.filter(member=member).aggregate(total=Sum('amount'))['total'] or 0.00
+    # Total contribution, this month's status, arrears and recent payments,
+    # cached per member until their dues change.
+    summary = member_summary(member)
 
-    # Determine the member's payment status for the current month.
-    today = timezone.now().date()
-    has_paid_this_month = Dues.objects.filter(
-        member=member,
-        payment_date__year=today.year,
-        payment_date__month=today.month
-    ).exists()
-
-    if has_paid_this_month:
+    if summary.has_paid_this_month:
         payment_status = "Up to Date"
         payment_status_class = "text-success"
     else:
         payment_status = "Outstanding"
         payment_status_class = "text-warning"
 
-    # Get the 5 most recent payments for the activity feed.
-    recent_payments = Dues.objects.filter(member=member).order_by('-payment_date')[:5]
-
-    # Get announcements that the logged-in member has not yet dismissed.
-    unread_announcements = Announcement.objects.exclude(read_by=member)
+    # Get announcements that the logged-in member has not yet dismissed. Fetched
+    # once here, since the template both counts and lists them.
+    unread_announcements = list(Announcement.objects.unread_by(member).select_related('author'))
 
     context = {
         'navbar':True,
-        'total_contribution': total_contribution,
+        'total_contribution': summary.total_contribution,
+        'arrears': summary.arrears,
         'payment_status': payment_status,
         'payment_status_class': payment_status_class,
-        'recent_payments': recent_payments,
+        'recent_payments': summary.recent_payments,
         'unread_announcements': unread_announcements,
     }
     return render(request, 'members/dashboard.html', context)
@@ -72,22 +66,23 @@ def fundDetailsView(request):
 
     if selected_year_str and selected_year_str.isdigit():
         selected_year = int(selected_year_str)
-        dues_for_display = all_dues_history.filter(payment_date__year=selected_year)
+        dues_for_display = all_dues_history.in_year(selected_year)
 
     # Calculate the total for the displayed period and the grand total
     total_dues_period = dues_for_display.aggregate(total=Sum('amount'))['total'] or 0.00
-    grand_total_dues = all_dues_history.aggregate(total=Sum('amount'))['total'] or 0.00
+    summary = member_summary(member)
+    grand_total_dues = summary.total_contribution
 
-    # Add pagination to the dues history
-    paginator = Paginator(dues_for_display, 12)  # Show 12 payments per page
-    page_number = request.GET.get('page')
-    dues_page_obj = paginator.get_page(page_number)
+    # Add keyset pagination to the dues history
+    paginator = CursorPaginator(dues_for_display, DUES_ORDERING, 12, with_total=True)  # Show 12 payments per page
+    dues_page_obj = paginator.get_page(request.GET.get('cursor'))
 
     context = {
         'navbar': True,
         'dues_history': dues_page_obj,
         'total_dues_period': total_dues_period,
         'grand_total_dues': grand_total_dues,
+        'arrears': summary.arrears,
         'available_years': available_years,
         'selected_year': selected_year,
     }
@@ -226,9 +221,12 @@ def updatesView(request):
 def updateProfilePictureView(request):
     """Handles the logic for updating a member's profile picture."""
     if request.method == 'POST':
+        previous_picture = request.user.profile_picture.name
         form = ProfilePictureForm(request.POST, request.FILES, instance=request.user)
         if form.is_valid():
-            form.save()
+            member = form.save()
+            # Resize in the background; pages show the original until the thumbnails exist.
+            schedule_thumbnails(member.profile_picture.name, previous_picture)
             messages.success(request, "Your profile picture has been updated successfully.")
             return redirect('updates')
         else:
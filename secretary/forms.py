@@ -12,4 +12,13 @@ class AnnouncementForm(forms.ModelForm):
         labels = {
             'title': 'Title',
             'content': 'Content',
-        }
\ No newline at end of file
+        }
+
+
+class AnnouncementAddForm(AnnouncementForm):
+    """Announcement form for new posts, with the option to broadcast by SMS."""
+    send_sms = forms.BooleanField(
+        required=False,
+        label='Also send to all members by SMS',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from secretary.models import AnnouncementBroadcast
+from utils.messaging import send_many_sms
+
+
+class Command(BaseCommand):
+    help = (
+        'Queues the SMS messages for pending announcement broadcasts in the outbox, '
+        'in batches released at a fixed interval. Run process_sms_outbox to send them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=AnnouncementBroadcast.BATCH_SIZE,
+                            help='Messages released to the outbox worker per batch.')
+        parser.add_argument('--interval', type=int, default=AnnouncementBroadcast.BATCH_INTERVAL_SECONDS,
+                            help='Seconds between the release of consecutive batches.')
+
+    def queue_broadcast(self, broadcast, batch_size, interval):
+        """Queues the remaining recipients of one broadcast and returns how many were queued."""
+        recipients = CustomUser.objects.filter(
+            is_active=True, pk__gt=broadcast.last_member_id,
+        ).exclude(phone_number='').order_by('pk').values_list('pk', 'phone_number').iterator(chunk_size=batch_size)
+
+        text = broadcast.sms_text()
+        release_at = timezone.now()
+        queued = 0
+        while batch := list(islice(recipients, batch_size)):
+            with transaction.atomic():
+                # Lock the broadcast so two runs never queue the same batch.
+                current = AnnouncementBroadcast.objects.select_for_update().get(pk=broadcast.pk)
+                if current.last_member_id != broadcast.last_member_id:
+                    self.stdout.write(self.style.WARNING(f'{broadcast} is being queued by another process.'))
+                    return queued
+                send_many_sms([(phone, text) for _, phone in batch], group=broadcast.sms_group, not_before=release_at)
+                broadcast.last_member_id = batch[-1][0]
+                broadcast.recipients_queued += len(batch)
+                broadcast.status = AnnouncementBroadcast.STATUS_RUNNING
+                broadcast.save(update_fields=['last_member_id', 'recipients_queued', 'status'])
+            queued += len(batch)
+            release_at += timedelta(seconds=interval)
+
+        broadcast.status = AnnouncementBroadcast.STATUS_COMPLETED
+        broadcast.completed_at = timezone.now()
+        broadcast.save(update_fields=['status', 'completed_at'])
+        return queued
+
+    def handle(self, *args, **options):
+        pending = AnnouncementBroadcast.objects.exclude(
+            status=AnnouncementBroadcast.STATUS_COMPLETED
+        ).select_related('announcement').order_by('pk')
+
+        for broadcast in pending:
+            queued = self.queue_broadcast(broadcast, options['batch_size'], options['interval'])
+            self.stdout.write(f'{broadcast}: {queued} messages queued.')
+        self.stdout.write(self.style.SUCCESS('Announcement broadcasts queued.'))
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:46
+
+import django.db.models.deletion
+from collections import defaultdict
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_read_by_to_watermarks(apps, schema_editor):
+    """
+    Converts the read_by rows into a watermark per user (the longest run of
+    read announcements from the oldest one) plus dismissals for read
+    announcements after the first unread one.
+    """
+    Announcement = apps.get_model('secretary', 'Announcement')
+    AnnouncementReadState = apps.get_model('secretary', 'AnnouncementReadState')
+    AnnouncementDismissal = apps.get_model('secretary', 'AnnouncementDismissal')
+
+    announcement_ids = sorted(Announcement.objects.values_list('pk', flat=True))
+    read = defaultdict(set)
+    for user_id, announcement_id in Announcement.read_by.through.objects.values_list('customuser_id', 'announcement_id').iterator():
+        read[user_id].add(announcement_id)
+
+    states, dismissals = [], []
+    for user_id, read_ids in read.items():
+        read_through = 0
+        for announcement_id in announcement_ids:
+            if announcement_id not in read_ids:
+                break
+            read_through = announcement_id
+        states.append(AnnouncementReadState(user_id=user_id, read_through=read_through))
+        dismissals.extend(
+            AnnouncementDismissal(user_id=user_id, announcement_id=announcement_id)
+            for announcement_id in read_ids if announcement_id > read_through
+        )
+
+    AnnouncementReadState.objects.bulk_create(states, batch_size=1000)
+    AnnouncementDismissal.objects.bulk_create(dismissals, batch_size=1000)
+
+
+def copy_watermarks_to_read_by(apps, schema_editor):
+    Announcement = apps.get_model('secretary', 'Announcement')
+    AnnouncementReadState = apps.get_model('secretary', 'AnnouncementReadState')
+    AnnouncementDismissal = apps.get_model('secretary', 'AnnouncementDismissal')
+    ReadBy = Announcement.read_by.through
+
+    rows = set(AnnouncementDismissal.objects.values_list('user_id', 'announcement_id'))
+    announcement_ids = list(Announcement.objects.values_list('pk', flat=True))
+    for user_id, read_through in AnnouncementReadState.objects.values_list('user_id', 'read_through'):
+        rows.update((user_id, announcement_id) for announcement_id in announcement_ids if announcement_id <= read_through)
+    ReadBy.objects.bulk_create(
+        [ReadBy(customuser_id=user_id, announcement_id=announcement_id) for user_id, announcement_id in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_customuser_search_text'),
+        ('secretary', '0003_announcementbroadcast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnnouncementReadState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='announcement_read_state', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('read_through', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnnouncementDismissal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dismissed_at', models.DateTimeField(auto_now_add=True)),
+                ('announcement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dismissals', to='secretary.announcement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='announcement_dismissals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'announcement'), name='unique_announcement_dismissal')],
+            },
+        ),
+        migrations.RunPython(copy_read_by_to_watermarks, copy_watermarks_to_read_by),
+        migrations.RemoveField(
+            model_name='announcement',
+            name='read_by',
+        ),
+    ]
@@ -1,6 +1,75 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+
+class AnnouncementManager(models.Manager):
+    """
+    Tracks what each user has read with a watermark plus a small dismissal
+    table instead of a row per (announcement, user) pair:
+
+    * AnnouncementReadState.read_through: every announcement with a primary
+      key up to this value has been read by the user.
+    * AnnouncementDismissal: announcements above the watermark that the user
+      dismissed individually.
+
+    Unread announcements are then a primary key range scan minus a handful
+    of dismissals, in a single query.
+    """
+    def unread_by(self, user):
+        read_through = AnnouncementReadState.objects.filter(user=user).values('read_through')
+        dismissed = AnnouncementDismissal.objects.filter(user=user, announcement=OuterRef('pk'))
+        return self.filter(
+            pk__gt=Coalesce(Subquery(read_through), Value(0)),
+        ).exclude(Exists(dismissed))
+
+    @transaction.atomic
+    def dismiss(self, user, announcement):
+        """Marks one announcement as read by `user`."""
+        AnnouncementDismissal.objects.bulk_create(
+            [AnnouncementDismissal(user=user, announcement=announcement)], ignore_conflicts=True
+        )
+        self.advance_watermark(user)
+
+    @transaction.atomic
+    def dismiss_many(self, user, announcement_ids=None):
+        """
+        Marks the given announcements, or every unread one when no IDs are
+        given, as read by `user`. Returns how many were unread.
+        """
+        unread = self.unread_by(user)
+        if announcement_ids is None:
+            dismissed = unread.count()
+            # Everything is read: the watermark alone covers it.
+            read_through = self.aggregate(newest=Max('pk'))['newest'] or 0
+            AnnouncementReadState.objects.update_or_create(user=user, defaults={'read_through': read_through})
+            AnnouncementDismissal.objects.filter(user=user).delete()
+            return dismissed
+
+        pending = list(unread.filter(pk__in=announcement_ids).values_list('pk', flat=True))
+        AnnouncementDismissal.objects.bulk_create(
+            [AnnouncementDismissal(user=user, announcement_id=pk) for pk in pending], ignore_conflicts=True
+        )
+        self.advance_watermark(user)
+        return len(pending)
+
+    def advance_watermark(self, user):
+        """
+        Moves the user's watermark up to just below their oldest unread
+        announcement (or to the newest announcement when none is unread) and
+        drops the dismissals it now covers.
+        """
+        first_unread = self.unread_by(user).order_by('pk').values_list('pk', flat=True).first()
+        if first_unread is not None:
+            read_through = first_unread - 1
+        else:
+            read_through = self.aggregate(newest=Max('pk'))['newest'] or 0
+
+        AnnouncementReadState.objects.update_or_create(user=user, defaults={'read_through': read_through})
+        AnnouncementDismissal.objects.filter(user=user, announcement_id__lte=read_through).delete()
+
+
 # Create your models here.
 class Announcement(models.Model):
     """
@@ -10,10 +79,98 @@ class Announcement(models.Model):
     content = models.TextField()
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='announcements')
     created_at = models.DateTimeField(auto_now_add=True)
-    read_by = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='read_announcements', blank=True)
+
+    objects = AnnouncementManager()
 
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ['-created_at']
+
+
+class AnnouncementReadState(models.Model):
+    """
+    Per-user watermark: every announcement with a primary key up to
+    `read_through` has been read or dismissed by the user.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='announcement_read_state')
+    read_through = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} read through announcement {self.read_through}"
+
+
+class AnnouncementDismissal(models.Model):
+    """
+    An announcement above the user's watermark that they have dismissed.
+    Rows are removed once the watermark passes them.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='announcement_dismissals')
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name='dismissals')
+    dismissed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.user} dismissed '{self.announcement}'"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'announcement'], name='unique_announcement_dismissal'),
+        ]
+
+
+class AnnouncementBroadcast(models.Model):
+    """
+    A request to send an announcement to every active member by SMS.
+
+    Posting the announcement only creates this record. The
+    `queue_announcement_broadcasts` command pages through the members and
+    queues their messages in the SMS outbox, spacing the batches out so the
+    gateway is not flooded; the outbox worker then sends them.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Queuing messages'),
+        (STATUS_COMPLETED, 'All messages queued'),
+    ]
+
+    # Messages released to the outbox worker per batch, and the gap between batches.
+    BATCH_SIZE = 100
+    BATCH_INTERVAL_SECONDS = 60
+
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name='broadcasts')
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    recipients_queued = models.PositiveIntegerField(default=0)
+    # Members are queued in primary key order; this is the last one queued, so
+    # an interrupted run resumes where it stopped.
+    last_member_id = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"SMS broadcast of '{self.announcement}'"
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def sms_group(self):
+        return f'broadcast:{self.pk}'
+
+    def sms_text(self):
+        return f"TWA: {self.announcement.title}\n{self.announcement.content}"
+
+    def progress(self):
+        """Sent, failed and pending message counts from the SMS outbox."""
+        from general.models import OutboundSms
+
+        counts = OutboundSms.objects.status_counts(self.sms_group)
+        return {
+            'sent': counts[OutboundSms.STATUS_SENT],
+            'failed': counts[OutboundSms.STATUS_FAILED],
+            'pending': counts[OutboundSms.STATUS_PENDING],
+        }
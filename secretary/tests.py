@@ -1,3 +1,227 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from general.models import OutboundSms
+from utils.messaging import send_many_sms
+from .models import Announcement, AnnouncementBroadcast, AnnouncementDismissal, AnnouncementReadState
 
 # Create your tests here.
+
+
+class AnnouncementReadStateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+        cls.announcements = [
+            Announcement.objects.create(title=f'Notice {index}', content='-', author=cls.user)
+            for index in range(5)
+        ]
+
+    def unread(self):
+        return sorted(Announcement.objects.unread_by(self.user).values_list('pk', flat=True))
+
+    def ids(self, *positions):
+        return [self.announcements[position].pk for position in positions]
+
+    def test_everything_is_unread_without_a_watermark(self):
+        self.assertEqual(self.unread(), self.ids(0, 1, 2, 3, 4))
+
+    def test_announcements_above_the_watermark_are_unread(self):
+        AnnouncementReadState.objects.create(user=self.user, read_through=self.announcements[2].pk)
+        self.assertEqual(self.unread(), self.ids(3, 4))
+        newer = Announcement.objects.create(title='Newer', content='-', author=self.user)
+        self.assertEqual(self.unread(), self.ids(3, 4) + [newer.pk])
+
+    def test_dismissed_announcements_are_read(self):
+        AnnouncementDismissal.objects.create(user=self.user, announcement=self.announcements[3])
+        self.assertEqual(self.unread(), self.ids(0, 1, 2, 4))
+
+    def test_dismiss_advances_the_watermark(self):
+        Announcement.objects.dismiss(self.user, self.announcements[1])
+        self.assertEqual(self.unread(), self.ids(0, 2, 3, 4))
+        self.assertEqual(self.user.announcement_read_state.read_through, 0)
+
+        Announcement.objects.dismiss(self.user, self.announcements[0])
+        self.assertEqual(self.unread(), self.ids(2, 3, 4))
+        self.user.announcement_read_state.refresh_from_db()
+        self.assertEqual(self.user.announcement_read_state.read_through, self.announcements[1].pk)
+        # The watermark now covers both dismissals, so their rows are gone.
+        self.assertFalse(AnnouncementDismissal.objects.filter(user=self.user).exists())
+
+    def test_dismiss_many(self):
+        self.assertEqual(Announcement.objects.dismiss_many(self.user, self.ids(0, 3)), 2)
+        self.assertEqual(Announcement.objects.dismiss_many(self.user, self.ids(0, 3)), 0)
+        self.assertEqual(self.unread(), self.ids(1, 2, 4))
+        self.assertEqual(
+            list(AnnouncementDismissal.objects.filter(user=self.user).values_list('announcement_id', flat=True)),
+            self.ids(3),
+        )
+
+        self.assertEqual(Announcement.objects.dismiss_many(self.user), 3)
+        self.assertEqual(self.unread(), [])
+        self.assertFalse(AnnouncementDismissal.objects.filter(user=self.user).exists())
+
+
+class DismissAnnouncementsViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(email='member@example.com', password='testing123')
+        cls.announcements = [
+            Announcement.objects.create(title=f'Notice {index}', content='-', author=cls.user)
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, data=None):
+        return self.client.post(reverse('dismiss_announcements'), data or {}, HTTP_ACCEPT='application/json')
+
+    def test_dismiss_all_answers_json_and_is_idempotent(self):
+        response = self.post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'dismissed': 3, 'unread_count': 0})
+        self.assertEqual(self.post().json(), {'dismissed': 0, 'unread_count': 0})
+        self.assertFalse(Announcement.objects.unread_by(self.user).exists())
+
+    def test_dismiss_selected(self):
+        response = self.post({'ids': [self.announcements[1].pk]})
+        self.assertEqual(response.json(), {'dismissed': 1, 'unread_count': 2})
+
+    def test_invalid_id(self):
+        response = self.post({'ids': ['abc']})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Announcement.objects.unread_by(self.user).count(), 3)
+
+    def test_get_is_rejected(self):
+        response = self.client.get(reverse('dismiss_announcements'), HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(Announcement.objects.unread_by(self.user).count(), 3)
+
+    def test_form_post_redirects_back(self):
+        response = self.client.post(reverse('dismiss_announcements'), HTTP_REFERER='/member/dashboard/')
+        self.assertRedirects(response, '/member/dashboard/', fetch_redirect_response=False)
+
+
+class QueueAnnouncementBroadcastsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user(email='secretary@example.com', password='testing123')
+        cls.members = [
+            CustomUser.objects.create_user(email=f'member{index}@example.com', password='testing123', phone_number=f'024000000{index}')
+            for index in range(7)
+        ]
+        CustomUser.objects.create_user(email='left@example.com', password='testing123', phone_number='0249999999', is_active=False)
+        announcement = Announcement.objects.create(title='AGM', content='Saturday at 10am.', author=author)
+        cls.broadcast = AnnouncementBroadcast.objects.create(announcement=announcement, requested_by=author)
+
+    def run_command(self):
+        call_command('queue_announcement_broadcasts', '--batch-size', '3', '--interval', '60', stdout=StringIO())
+        self.broadcast.refresh_from_db()
+
+    def queued_numbers(self):
+        return list(OutboundSms.objects.filter(group=self.broadcast.sms_group).order_by('pk').values_list('to_number', flat=True))
+
+    def test_queues_active_members_in_spaced_batches(self):
+        self.run_command()
+        self.assertEqual(self.queued_numbers(), [member.phone_number for member in self.members])
+        self.assertEqual(self.broadcast.status, AnnouncementBroadcast.STATUS_COMPLETED)
+        self.assertEqual(self.broadcast.recipients_queued, 7)
+        self.assertEqual(self.broadcast.last_member_id, self.members[-1].pk)
+
+        release_times = sorted(set(OutboundSms.objects.values_list('next_attempt_at', flat=True)))
+        self.assertEqual(len(release_times), 3)
+        self.assertEqual(release_times[2] - release_times[0], timedelta(seconds=120))
+        self.assertEqual(OutboundSms.objects.get(to_number=self.members[0].phone_number).body, 'TWA: AGM\nSaturday at 10am.')
+
+    def test_rerun_queues_nothing_again(self):
+        self.run_command()
+        self.run_command()
+        self.assertEqual(len(self.queued_numbers()), 7)
+        self.assertEqual(self.broadcast.recipients_queued, 7)
+
+    def test_interrupted_run_resumes_from_the_watermark(self):
+        calls = []
+
+        def fail_on_second_batch(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError('Worker killed')
+            return send_many_sms(*args, **kwargs)
+
+        with mock.patch(
+            'secretary.management.commands.queue_announcement_broadcasts.send_many_sms', side_effect=fail_on_second_batch,
+        ), self.assertRaises(RuntimeError):
+            self.run_command()
+        self.broadcast.refresh_from_db()
+        self.assertEqual(self.broadcast.status, AnnouncementBroadcast.STATUS_RUNNING)
+        self.assertEqual(self.broadcast.last_member_id, self.members[2].pk)
+        self.assertEqual(len(self.queued_numbers()), 3)
+
+        self.run_command()
+        self.assertEqual(self.queued_numbers(), [member.phone_number for member in self.members])
+        self.assertEqual(self.broadcast.recipients_queued, 7)
+        self.assertEqual(self.broadcast.status, AnnouncementBroadcast.STATUS_COMPLETED)
+
+
+class ReadByMigrationTests(TransactionTestCase):
+    """
+    Migrates the read_by table of 0003 forward into watermarks and
+    dismissals, and back again.
+    """
+    migrate_from = [('secretary', '0003_announcementbroadcast')]
+    migrate_to = [('secretary', '0004_announcement_read_state')]
+
+    def migrate(self, targets):
+        """Migrates secretary to `targets` and returns the matching historical apps."""
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        # Only secretary moved; every other app stays fully migrated.
+        others = [node for node in executor.loader.graph.leaf_nodes() if node[0] != 'secretary']
+        return executor.loader.project_state(others + targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_read_by_rows_become_watermarks_and_dismissals(self):
+        apps = self.migrate(self.migrate_from)
+        User = apps.get_model('accounts', 'CustomUser')
+        Announcement = apps.get_model('secretary', 'Announcement')
+        author = User.objects.create(email='author@example.com', password='-', search_text='')
+        reader = User.objects.create(email='reader@example.com', password='-', search_text='')
+        announcements = [Announcement.objects.create(title=f'Notice {index}', content='-', author=author) for index in range(4)]
+        # The reader has read the first two and the last one; the author only the third.
+        for position in (0, 1, 3):
+            announcements[position].read_by.add(reader)
+        announcements[2].read_by.add(author)
+
+        apps = self.migrate(self.migrate_to)
+        ReadState = apps.get_model('secretary', 'AnnouncementReadState')
+        Dismissal = apps.get_model('secretary', 'AnnouncementDismissal')
+        self.assertEqual(
+            dict(ReadState.objects.values_list('user_id', 'read_through')),
+            {reader.pk: announcements[1].pk, author.pk: 0},
+        )
+        self.assertEqual(
+            set(Dismissal.objects.values_list('user_id', 'announcement_id')),
+            {(reader.pk, announcements[3].pk), (author.pk, announcements[2].pk)},
+        )
+
+        apps = self.migrate(self.migrate_from)
+        Announcement = apps.get_model('secretary', 'Announcement')
+        self.assertEqual(
+            set(Announcement.read_by.through.objects.values_list('customuser_id', 'announcement_id')),
+            {(reader.pk, announcements[position].pk) for position in (0, 1, 3)} | {(author.pk, announcements[2].pk)},
+        )
@@ -8,6 +8,8 @@ urlpatterns = [
     path('members/<int:pk>/', views.memberDetailView, name='member_detail'),
     path('announcements/edit/<int:pk>/', views.announcement_edit_view, name='announcement_edit'),
     path('announcements/delete/<int:pk>/', views.announcement_delete_view, name='announcement_delete'),
+    path('announcements/broadcasts/<int:pk>/', views.broadcast_status_view, name='broadcast_status'),
+    path('announcements/dismiss/', views.dismiss_announcements_view, name='dismiss_announcements'),
     path('announcements/<int:pk>/dismiss/', views.dismiss_announcement_view, name='dismiss_announcement'),
     path('members/<int:pk>/edit/', views.memberEditView, name='member_edit'),
 ]
\ No newline at end of file
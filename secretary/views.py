@@ -2,12 +2,13 @@ from django.shortcuts import render, get_object_or_404, redirect, reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from accounts.models import CustomUser
-from django.db.models import Q
-from django.core.paginator import Paginator
+from accounts.search import search_members
+from utils.pagination import CursorPaginator, MEMBER_ORDERING
 from accounts.forms import EditUserForm
-from .models import Announcement
-from django.http import HttpResponseForbidden
-from .forms import AnnouncementForm
+from .models import Announcement, AnnouncementBroadcast
+from django.http import HttpResponseForbidden, JsonResponse
+from django.views.decorators.http import require_POST
+from .forms import AnnouncementAddForm, AnnouncementForm
 
 # Create your views here.
 @login_required
@@ -15,7 +16,8 @@ def secretaryDashboardView(request):
     """
     Displays the secretary dashboard with recent announcements and a form to add new ones.
     """
-    announcements = Announcement.objects.all()[:5]  # Get the 5 most recent announcements
+    # Get the 5 most recent announcements, with their SMS broadcasts for the status links
+    announcements = Announcement.objects.select_related('author').prefetch_related('broadcasts')[:5]
     context = {
         'navbar': True,
         'announcements': announcements,
@@ -32,20 +34,11 @@ def membersListView(request):
     members_list = CustomUser.objects.all()
 
     if query:
-        members_list = members_list.filter(
-            Q(first_name__icontains=query) |
-            Q(middle_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query)
-        ).distinct()
+        members_list = search_members(members_list, query)
 
-    # Order the results for consistent display before pagination
-    members_list = members_list.order_by('first_name', 'last_name')
-
-    # Set up pagination: 15 members per page
-    paginator = Paginator(members_list, 15)
-    page_number = request.GET.get('page')
-    members = paginator.get_page(page_number)
+    # Set up keyset pagination, ordered by name: 15 members per page
+    paginator = CursorPaginator(members_list, MEMBER_ORDERING, 15)
+    members = paginator.get_page(request.GET.get('cursor'))
 
     context = {
         'members': members,
@@ -91,23 +84,44 @@ def announcement_add_view(request):
     Handles creating a new announcement on a dedicated page.
     """
     if request.method == 'POST':
-        form = AnnouncementForm(request.POST)
+        form = AnnouncementAddForm(request.POST)
         if form.is_valid():
             announcement = form.save(commit=False)
             announcement.author = request.user
             announcement.save()
+            if form.cleaned_data['send_sms']:
+                # Only record the request here; the messages are queued and
+                # sent by background commands, never inside this request.
+                broadcast = AnnouncementBroadcast.objects.create(announcement=announcement, requested_by=request.user)
+                messages.success(request, "Announcement posted. The SMS broadcast has been queued.")
+                return redirect('broadcast_status', pk=broadcast.pk)
             messages.success(request, "Announcement posted successfully.")
             return redirect('secretary_dashboard')
         else:
             messages.error(request, "There was an error with your submission. Please check the form.")
     else:
-        form = AnnouncementForm()
+        form = AnnouncementAddForm()
 
     context = {
         'form': form,
     }
     return render(request, 'secretary/announcement_form.html', context)
 
+@login_required
+def broadcast_status_view(request, pk):
+    """
+    Shows how far an announcement's SMS broadcast has got: members queued and
+    messages sent, failed and still pending.
+    """
+    broadcast = get_object_or_404(AnnouncementBroadcast.objects.select_related('announcement'), pk=pk)
+    progress = broadcast.progress()
+    context = {
+        'broadcast': broadcast,
+        'progress': progress,
+        'sent_percent': round(100 * progress['sent'] / broadcast.recipients_queued) if broadcast.recipients_queued else 0,
+    }
+    return render(request, 'secretary/broadcast_status.html', context)
+
 @login_required
 def announcement_edit_view(request, pk):
     """
@@ -171,8 +185,36 @@ def dismiss_announcement_view(request, pk):
 
     if request.method == 'POST':
         announcement = get_object_or_404(Announcement, pk=pk)
-        announcement.read_by.add(request.user)
+        Announcement.objects.dismiss(request.user, announcement)
 
     # Redirect back to the referer page, or to the fallback if not available.
     referer = request.META.get('HTTP_REFERER')
-    return redirect(referer or fallback_redirect)
\ No newline at end of file
+    return redirect(referer or fallback_redirect)
+
+@login_required
+@require_POST
+def dismiss_announcements_view(request):
+    """
+    Marks several announcements as read for the current user in one request:
+    the ones listed in the `ids` POST field, or all unread ones when none are
+    given. Answers JSON to scripted requests so dashboards can update in place,
+    and otherwise redirects back like dismiss_announcement_view.
+    """
+    try:
+        ids = [int(value) for value in request.POST.getlist('ids')] or None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid announcement ID.'}, status=400)
+
+    dismissed = Announcement.objects.dismiss_many(request.user, ids)
+
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({
+            'dismissed': dismissed,
+            'unread_count': Announcement.objects.unread_by(request.user).count(),
+        })
+
+    if hasattr(request.user, 'is_staff') and request.user.is_staff:
+        fallback_redirect = 'finance:finance_dashboard'
+    else:
+        fallback_redirect = 'dashboard'
+    return redirect(request.META.get('HTTP_REFERER') or fallback_redirect)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 from decouple import config, Csv
 import dj_database_url
@@ -29,6 +30,8 @@ DEBUG = config('DEBUG', default=False, cast=bool)
 
 ALLOWED_HOSTS = config('ALLOWED_HOSTS', cast=Csv())
 
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 
 # Application definition
 
@@ -62,9 +65,11 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'utils.instrumentation.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'utils.uploads.OversizedUploadMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -75,15 +80,24 @@ ROOT_URLCONF = 'twa.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with rendering time reported to QueryMetricsMiddleware.
+        'BACKEND': 'utils.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': ['templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Each template is read and compiled once per process and then
+            # reused. The development server clears the cache when a template
+            # file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -100,10 +114,72 @@ DATABASES = {
     )
 }
 
+# Cache used for dashboard metrics. LocMem works out of the box for local
+# development; point this at a shared cache (e.g. Redis or Memcached) when
+# running several worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'twa-default',
+    }
+}
+
 email_port_str = config('EMAIL_PORT', default='587')
 EMAIL_PORT = int(email_port_str) if email_port_str else 587
 
-SMS_BACKEND = 'sms_gateway.backends.console.SmsBackend'
+# Request instrumentation (see utils/instrumentation.py). Budgets are the most
+# queries a page may run, keyed by URL name; going over logs a warning, or
+# raises when QUERY_BUDGET_RAISE is on (always during tests).
+SERVER_TIMING_HEADER = config('SERVER_TIMING_HEADER', default=DEBUG, cast=bool)
+QUERY_BUDGET_RAISE = config('QUERY_BUDGET_RAISE', default=TESTING, cast=bool)
+QUERY_BUDGETS = {
+    'finance:finance_dashboard': 12,
+    'finance:finance_report': 8,
+    'finance:finance_members_list': 5,
+    'finance:finance_member_detail': 9,
+    'finance:manage_benefits': 5,
+    'chairperson:chairperson_dashboard': 14,
+    'chairperson:financial_report': 8,
+    'chairperson:members_list': 5,
+    'chairperson:manage_benefits': 5,
+    'dashboard': 5,
+    'fund_details': 9,
+    'benefit_list': 5,
+    'secretary_dashboard': 6,
+    'members_list': 5,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per request with its query count and timings.
+        'twa.performance': {
+            'handlers': ['console'],
+            'level': config('PERFORMANCE_LOG_LEVEL', default='WARNING' if TESTING else 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# SMS delivery (see utils/sms_backends). Deployments with Twilio credentials
+# send through Twilio unless SMS_BACKEND says otherwise. Without credentials,
+# or with DEBUG on, messages are printed to the console instead, and tests
+# keep them in memory like Django does for email.
+TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', default='')
+TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', default='')
+TWILIO_PHONE_NUMBER = config('TWILIO_PHONE_NUMBER', default='')
+if TESTING:
+    default_sms_backend = 'utils.sms_backends.locmem.SmsBackend'
+elif TWILIO_ACCOUNT_SID and not DEBUG:
+    default_sms_backend = 'utils.sms_backends.twilio.SmsBackend'
+else:
+    default_sms_backend = 'utils.sms_backends.console.SmsBackend'
+SMS_BACKEND = config('SMS_BACKEND', default=default_sms_backend)
+SMS_FILE_PATH = config('SMS_FILE_PATH', default=str(BASE_DIR / 'sms-messages.log'))
 
 
 # Password validation
@@ -148,6 +224,23 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Largest benefit supporting document accepted, in bytes (5 MB by default).
+DOCUMENT_MAX_UPLOAD_SIZE = config('DOCUMENT_MAX_UPLOAD_SIZE', default=5 * 1024 * 1024, cast=int)
+
+# Every file upload (benefit documents, profile pictures, dues import CSVs)
+# is capped at FILE_UPLOAD_MAX_SIZE while the request is parsed (see
+# utils/uploads.py), so an oversized file is never kept in memory or spooled
+# to disk. Smaller files stay in memory up to FILE_UPLOAD_MAX_MEMORY_SIZE;
+# the other form fields of a request may total DATA_UPLOAD_MAX_MEMORY_SIZE.
+FILE_UPLOAD_MAX_SIZE = config('FILE_UPLOAD_MAX_SIZE', default=10 * 1024 * 1024, cast=int)
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
+FILE_UPLOAD_HANDLERS = [
+    'utils.uploads.MaxUploadSizeHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,89 @@
+"""
+Caching for the association-wide numbers shown on the role dashboards.
+
+Computed metrics are stored under a key that includes a data version. Any
+write to Dues, Benefit, CustomUser or Announcement bumps the version once its
+transaction commits (see the receivers connected in finance/signals.py), so
+the next dashboard hit recomputes instead of serving stale figures. Bumping
+any earlier would let a request that runs before the commit cache the old
+figures under the new version.
+
+The version starts from the current time in nanoseconds rather than 1, so if
+the cache evicts the version key the replacement is still newer than every
+version already used in cached keys.
+
+A member's own dashboard figures are cached under a per-member key instead,
+which only that member's dues writes clear, also on commit (see
+finance/summary.py). Other per-user parts of a dashboard, such as unread
+announcements, are never cached.
+
+Works with any Django cache backend. With the default LocMem cache each
+process has its own copy, so the timeout bounds how long another process
+can serve figures from before a write.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+DASHBOARD_VERSION_KEY = 'dashboard:version'
+DASHBOARD_CACHE_TIMEOUT = 300  # seconds
+
+
+def get_dashboard_version():
+    return cache.get_or_set(DASHBOARD_VERSION_KEY, time.time_ns, timeout=None)
+
+
+def _next_dashboard_version():
+    try:
+        cache.incr(DASHBOARD_VERSION_KEY)
+    except ValueError:
+        # The key expired or was evicted; a fresh time-based value is newer than any used before.
+        cache.add(DASHBOARD_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def bump_dashboard_version():
+    """
+    Invalidates every cached dashboard by moving to a new data version when
+    the current transaction commits, or straight away outside a transaction.
+    """
+    transaction.on_commit(_next_dashboard_version)
+
+
+def cached_dashboard_metrics(role, builder, timeout=DASHBOARD_CACHE_TIMEOUT):
+    """
+    Returns the metrics dict for a role's dashboard, calling `builder(today)`
+    only when there is no entry for today's date and the current data version.
+    The dict also carries that version as 'data_version', for keying the
+    template fragments that render the metrics.
+    """
+    today = timezone.now().date()
+    version = get_dashboard_version()
+    key = f"dashboard:{role}:{today.isoformat()}:v{version}"
+    return {**cache.get_or_set(key, lambda: builder(today), timeout), 'data_version': version}
+
+
+def member_summary_key(member_id, day=None):
+    day = day or timezone.now().date()
+    return f"member_summary:{member_id}:{day.isoformat()}"
+
+
+def invalidate_member_summaries(member_ids):
+    """
+    Drops today's cached summaries for the given members once the current
+    transaction commits, like bump_dashboard_version. Entries for earlier
+    days are never read again and simply expire.
+    """
+    keys = [member_summary_key(member_id) for member_id in set(member_ids)]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_dashboard_metrics(sender, instance=None, update_fields=None, **kwargs):
+    """
+    Signal receiver for post_save/post_delete on the models the dashboards read.
+    Saves that only touch last_login (every sign-in) do not change any metric.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_dashboard_version()
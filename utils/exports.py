@@ -0,0 +1,102 @@
+import csv
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from accounts.models import CustomUser
+from finance.models import Dues
+from members.models import Benefit
+
+# Rows fetched from the database per round trip while streaming.
+EXPORT_CHUNK_SIZE = 2000
+
+# Spreadsheet apps run a cell starting with one of these as a formula.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """
+    A file-like object that just returns what is written to it, so csv.writer
+    can format one row at a time for StreamingHttpResponse.
+    """
+    def write(self, value):
+        return value
+
+
+def escape_formula(value):
+    """
+    Prefixes text that a spreadsheet would run as a formula with a quote, so
+    names and notes members typed in open as plain text.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def stream_csv(filename, header, rows):
+    """
+    Returns a StreamingHttpResponse that writes `header` followed by `rows` as CSV.
+    `rows` should be a lazy iterable so memory use stays flat for large exports.
+    Text cells are passed through escape_formula().
+    """
+    writer = csv.writer(Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([escape_formula(value) for value in row])
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _export_filename(name, year=None):
+    suffix = year if year else timezone.now().strftime('%Y%m%d')
+    return f"{name}_{suffix}.csv"
+
+
+def parse_export_year(request):
+    """Returns the optional ?year= filter as an int, or None."""
+    year = request.GET.get('year', '')
+    return int(year) if year.isdigit() else None
+
+
+def dues_export_response(year=None):
+    """Streams the full dues ledger, optionally limited to one year."""
+    dues = Dues.objects.order_by('payment_date', 'pk')
+    if year:
+        dues = dues.in_year(year)
+    rows = dues.values_list(
+        'receipt_number', 'payment_date', 'member__staff_id',
+        'member__first_name', 'member__last_name', 'amount', 'notes',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    header = ['Receipt Number', 'Payment Date', 'Staff ID', 'First Name', 'Last Name', 'Amount (GHS)', 'Notes']
+    return stream_csv(_export_filename('dues', year), header, rows)
+
+
+def members_export_response():
+    """Streams the roster of active, non-superuser members."""
+    rows = CustomUser.objects.filter(
+        is_superuser=False, is_active=True
+    ).order_by('last_name', 'first_name', 'pk').values_list(
+        'staff_id', 'first_name', 'middle_name', 'last_name', 'email',
+        'phone_number', 'category', 'gender', 'region', 'date_joined',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    header = ['Staff ID', 'First Name', 'Middle Name', 'Last Name', 'Email',
+              'Phone Number', 'Category', 'Gender', 'Region', 'Date Joined']
+    return stream_csv(_export_filename('members'), header, rows)
+
+
+def benefits_export_response(year=None):
+    """Streams all benefit claims, optionally limited to those submitted in one year."""
+    benefits = Benefit.objects.order_by('date_submitted', 'pk')
+    if year:
+        benefits = benefits.in_year(year)
+    rows = benefits.values_list(
+        'date_submitted', 'member__staff_id', 'member__first_name', 'member__last_name',
+        'benefit_type', 'status', 'honoured', 'amount', 'processed_date',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    header = ['Date Submitted', 'Staff ID', 'First Name', 'Last Name', 'Benefit Type',
+              'Status', 'Honoured', 'Amount (GHS)', 'Processed Date']
+    return stream_csv(_export_filename('benefits', year), header, rows)
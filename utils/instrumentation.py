@@ -0,0 +1,141 @@
+"""
+Per-request database and rendering metrics.
+
+QueryMetricsMiddleware counts the queries each request runs and times
+them, along with template rendering and the whole request. It reports
+them in three ways:
+
+* a Server-Timing header (when SERVER_TIMING_HEADER is on), which the
+  browser dev tools show in the network panel;
+* one structured log line per request on the 'twa.performance' logger,
+  including the slowest statements;
+* query budgets: settings.QUERY_BUDGETS maps URL names (with their
+  namespace, e.g. 'finance:finance_dashboard') to the most queries the
+  page may run. A request over budget logs a warning. When
+  QUERY_BUDGET_RAISE is on, as it is in the test suite, it raises
+  QueryBudgetExceeded instead, so a new N+1 fails the tests that render
+  the page.
+
+Rendering time is collected by InstrumentedDjangoTemplates, a drop-in
+replacement for the DjangoTemplates backend.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('twa.performance')
+
+SLOWEST_STATEMENTS = 3
+STATEMENT_PREVIEW_LENGTH = 200
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.query_count = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        self.statements = []  # (seconds, sql), kept to the slowest few
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper: times every statement run during the request."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.query_count += 1
+            self.sql_seconds += elapsed
+            self.statements.append((elapsed, sql))
+            if len(self.statements) > SLOWEST_STATEMENTS:
+                self.statements.sort(key=lambda item: item[0], reverse=True)
+                del self.statements[SLOWEST_STATEMENTS:]
+
+    def slowest(self):
+        return [
+            {'ms': round(seconds * 1000, 2), 'sql': sql[:STATEMENT_PREVIEW_LENGTH]}
+            for seconds, sql in sorted(self.statements, key=lambda item: item[0], reverse=True)
+        ]
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.render_seconds += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates backend whose templates report their rendering time."""
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        total_seconds = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else None
+
+        if getattr(settings, 'SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={metrics.sql_seconds * 1000:.1f};desc="{metrics.query_count} queries"',
+                f'render;dur={metrics.render_seconds * 1000:.1f}',
+                f'total;dur={total_seconds * 1000:.1f}',
+            ])
+
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'queries': metrics.query_count,
+            'sql_ms': round(metrics.sql_seconds * 1000, 2),
+            'render_ms': round(metrics.render_seconds * 1000, 2),
+            'total_ms': round(total_seconds * 1000, 2),
+            'slowest': metrics.slowest(),
+        }))
+
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+        if budget is not None and metrics.query_count > budget:
+            message = f'{url_name} ran {metrics.query_count} queries, over its budget of {budget}.'
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
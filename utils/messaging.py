@@ -1,45 +1,62 @@
-# To use this function, you need to install the Twilio Python library:
-# pip install twilio
+# SMS messages are not sent during the request. send_sms() stores them in the
+# outbox (general.models.OutboundSms) and the worker command sends them:
+# python manage.py process_sms_outbox
 #
-# You also need to set the following environment variables:
-# TWILIO_ACCOUNT_SID: Your Twilio Account SID
-# TWILIO_AUTH_TOKEN: Your Twilio Auth Token
-# TWILIO_PHONE_NUMBER: Your Twilio phone number
+# Delivery goes through the backend named by settings.SMS_BACKEND (see
+# utils/sms_backends). The Twilio backend needs the twilio library
+# (pip install twilio) and the TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN and
+# TWILIO_PHONE_NUMBER environment variables.
 
-import os
-from twilio.rest import Client
-from decouple import config
+from django.conf import settings
+from django.utils.module_loading import import_string
 
 
+def get_sms_backend(backend=None, **kwargs):
+    """
+    Returns an instance of the SMS backend at dotted path `backend`, or of
+    settings.SMS_BACKEND when none is given.
+    """
+    return import_string(backend or settings.SMS_BACKEND)(**kwargs)
+
 
 def send_sms(to_number, message):
     """
-    Sends an SMS message using Twilio.
+    Queues an SMS message for delivery by the outbox worker.
 
     Args:
         to_number (str): The recipient's phone number in E.164 format.
         message (str): The message to send.
 
     Returns:
-        bool: True if the message was sent successfully, False otherwise.
-    """
-    account_sid = config("TWILIO_ACCOUNT_SID")
-    auth_token = config("TWILIO_AUTH_TOKEN")
-    from_number = config("TWILIO_PHONE_NUMBER")
-
-    if not all([account_sid, auth_token, from_number]):
-        print("Twilio credentials are not configured. Please set the environment variables.")
-        return False
-
-    try:
-        client = Client(account_sid, auth_token)
-        message = client.messages.create(
-            to=to_number,
-            from_=from_number,
-            body=message
-        )
-        print(f"Message sent successfully with SID: {message.sid}")
-        return True
-    except Exception as e:
-        print(f"Error sending SMS: {e}")
-        return False
+        OutboundSms: The queued outbox entry.
+    """
+    from general.models import OutboundSms
+
+    return OutboundSms.objects.enqueue(to_number, message)
+
+
+def send_many_sms(messages, group='', not_before=None):
+    """
+    Queues several (to_number, message) pairs with one insert.
+
+    Args:
+        messages: Iterable of (to_number, message) pairs.
+        group (str): Tag used to count the messages' progress together.
+        not_before (datetime): Earliest time the worker may send them.
+
+    Returns:
+        list[OutboundSms]: The queued outbox entries.
+    """
+    from general.models import OutboundSms
+
+    return OutboundSms.objects.enqueue_many(messages, group=group, not_before=not_before)
+
+
+def deliver_sms(to_number, message):
+    """
+    Sends an SMS message right away through the configured backend.
+
+    Returns:
+        str: The gateway's message ID.
+    """
+    return get_sms_backend().send(to_number, message)
@@ -0,0 +1,146 @@
+"""
+Keyset (cursor) pagination.
+
+Django's Paginator counts the whole result set and then skips rows with
+OFFSET, so each page gets slower the deeper it is. CursorPaginator instead
+remembers the sort key of the last row shown and asks the database for the
+rows that come after it, which an index on the ordering columns serves at
+the same cost for every page.
+
+The position is handed to the browser as an opaque, signed token in the
+?cursor= query parameter.
+"""
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+
+CURSOR_SALT = 'utils.pagination.cursor'
+
+# Orderings used across the role views. Each ends in the primary key so the
+# key is unique and no row is skipped or repeated between pages.
+MEMBER_ORDERING = ('last_name', 'first_name', 'pk')
+DUES_ORDERING = ('-payment_date', '-pk')
+
+
+class CursorPage:
+    """
+    One page of results. Iterates like a Paginator page and exposes the tokens
+    for the neighbouring pages.
+    """
+    def __init__(self, object_list, next_token=None, previous_token=None, approximate_total=None):
+        self.object_list = object_list
+        self.next_token = next_token
+        self.previous_token = previous_token
+        self.approximate_total = approximate_total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_token is not None
+
+    def has_previous(self):
+        return self.previous_token is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginates `queryset` by the fields in `ordering` (prefix a field with '-'
+    for descending order). The last field must make the key unique, e.g. 'pk'.
+    """
+    def __init__(self, queryset, ordering, per_page, with_total=False):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.with_total = with_total
+        self.model = queryset.model
+
+    def _field(self, name):
+        return self.model._meta.pk if name == 'pk' else self.model._meta.get_field(name)
+
+    def encode(self, direction, obj):
+        values = [self._field(field.lstrip('-')).value_to_string(obj) for field in self.ordering]
+        return signing.dumps([direction, values], salt=CURSOR_SALT, compress=True)
+
+    def decode(self, token):
+        """Returns (direction, key values), or (None, None) for a missing or invalid token."""
+        if not token:
+            return None, None
+        try:
+            direction, values = signing.loads(token, salt=CURSOR_SALT)
+            if direction not in ('next', 'prev') or len(values) != len(self.ordering):
+                raise ValueError
+            values = [
+                self._field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (signing.BadSignature, ValidationError, ValueError, TypeError):
+            return None, None
+        return direction, values
+
+    def _after(self, values, reverse=False):
+        """
+        Builds the filter for rows strictly after `values` in the ordering
+        (or before them when `reverse` is set), expanded into an OR of
+        prefixes so it works on every database backend.
+        """
+        names = [field.lstrip('-') for field in self.ordering]
+        condition = Q()
+        for position, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            equal_prefix = dict(zip(names[:position], values[:position]))
+            condition |= Q(**equal_prefix, **{f"{names[position]}__{'lt' if descending else 'gt'}": values[position]})
+
+        # Bound the leading column as well, so an index on it can be used for a range scan.
+        descending = self.ordering[0].startswith('-') != reverse
+        return Q(**{f"{names[0]}__{'lte' if descending else 'gte'}": values[0]}) & condition
+
+    def get_page(self, token=None):
+        direction, values = self.decode(token)
+        queryset = self.queryset
+
+        if direction == 'prev':
+            reversed_ordering = [f[1:] if f.startswith('-') else f'-{f}' for f in self.ordering]
+            rows = list(queryset.filter(self._after(values, reverse=True)).order_by(*reversed_ordering)[:self.per_page + 1])
+            has_more_before = len(rows) > self.per_page
+            rows = list(reversed(rows[:self.per_page]))
+            has_previous, has_next = has_more_before, True
+        else:
+            if direction == 'next':
+                queryset = queryset.filter(self._after(values))
+            rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = direction == 'next'
+
+        return CursorPage(
+            rows,
+            next_token=self.encode('next', rows[-1]) if rows and has_next else None,
+            previous_token=self.encode('prev', rows[0]) if rows and has_previous else None,
+            approximate_total=approximate_count(self.queryset) if self.with_total else None,
+        )
+
+
+def approximate_count(queryset):
+    """
+    Row count for display purposes. On PostgreSQL an unfiltered table uses the
+    planner's estimate instead of a full COUNT(*); everything else falls back
+    to an exact count.
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    return queryset.count()
@@ -0,0 +1,27 @@
+class BaseSmsBackend:
+    """
+    Base class for SMS backends, modelled on Django's email backends.
+
+    Subclasses implement send(). Backends whose gateway accepts several
+    messages in one call override send_many() and set supports_batch, so
+    the outbox worker hands them a whole batch instead of one message per
+    thread.
+    """
+    supports_batch = False
+
+    def send(self, to_number, message):
+        """Sends one message and returns the gateway's message ID. Raises on failure."""
+        raise NotImplementedError('subclasses of BaseSmsBackend must override send()')
+
+    def send_many(self, messages):
+        """
+        Sends (to_number, message) pairs. Returns one result per message, in
+        order: the gateway's message ID, or the exception raised for it.
+        """
+        results = []
+        for to_number, message in messages:
+            try:
+                results.append(self.send(to_number, message))
+            except Exception as e:
+                results.append(e)
+        return results
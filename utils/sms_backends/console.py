@@ -0,0 +1,21 @@
+import itertools
+import sys
+import threading
+
+from .base import BaseSmsBackend
+
+_counter = itertools.count(1)
+
+
+class SmsBackend(BaseSmsBackend):
+    """Writes messages to a stream (stdout by default) instead of sending them."""
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def send(self, to_number, message):
+        message_id = f'console-{next(_counter)}'
+        with self._lock:
+            self.stream.write(f'SMS {message_id} to {to_number}:\n{message}\n{"-" * 40}\n')
+            self.stream.flush()
+        return message_id
@@ -0,0 +1,31 @@
+import itertools
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+
+from .base import BaseSmsBackend
+
+_counter = itertools.count(1)
+_lock = threading.Lock()
+
+
+class SmsBackend(BaseSmsBackend):
+    """Appends messages to the file named by settings.SMS_FILE_PATH."""
+    supports_batch = True
+
+    def __init__(self, file_path=None):
+        self.file_path = file_path or settings.SMS_FILE_PATH
+
+    def _format(self, to_number, message):
+        message_id = f'file-{next(_counter)}'
+        return message_id, f'[{timezone.now().isoformat()}] SMS {message_id} to {to_number}:\n{message}\n{"-" * 40}\n'
+
+    def send(self, to_number, message):
+        return self.send_many([(to_number, message)])[0]
+
+    def send_many(self, messages):
+        entries = [self._format(to_number, message) for to_number, message in messages]
+        with _lock, open(self.file_path, 'a', encoding='utf-8') as handle:
+            handle.writelines(text for _, text in entries)
+        return [message_id for message_id, _ in entries]
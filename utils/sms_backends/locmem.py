@@ -0,0 +1,21 @@
+import itertools
+
+from .base import BaseSmsBackend
+
+# Messages "sent" by this backend, as (to_number, message) pairs. Tests can
+# inspect and clear this list.
+outbox = []
+
+_counter = itertools.count(1)
+
+
+class SmsBackend(BaseSmsBackend):
+    """Keeps messages in memory, in utils.sms_backends.locmem.outbox."""
+    supports_batch = True
+
+    def send(self, to_number, message):
+        outbox.append((to_number, message))
+        return f'locmem-{next(_counter)}'
+
+    def send_many(self, messages):
+        return [self.send(to_number, message) for to_number, message in messages]
@@ -0,0 +1,41 @@
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import BaseSmsBackend
+
+# One Twilio client (and so one pooled HTTP session) per set of credentials,
+# shared by every backend instance and thread in the process.
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(account_sid, auth_token):
+    key = (account_sid, auth_token)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                from twilio.rest import Client
+                client = _clients[key] = Client(account_sid, auth_token)
+    return client
+
+
+class SmsBackend(BaseSmsBackend):
+    """Sends messages through Twilio using the TWILIO_* settings."""
+    def __init__(self, account_sid=None, auth_token=None, from_number=None):
+        self.account_sid = account_sid or settings.TWILIO_ACCOUNT_SID
+        self.auth_token = auth_token or settings.TWILIO_AUTH_TOKEN
+        self.from_number = from_number or settings.TWILIO_PHONE_NUMBER
+        if not all([self.account_sid, self.auth_token, self.from_number]):
+            raise ImproperlyConfigured(
+                'Twilio credentials are not configured. Set TWILIO_ACCOUNT_SID, '
+                'TWILIO_AUTH_TOKEN and TWILIO_PHONE_NUMBER.'
+            )
+
+    def send(self, to_number, message):
+        client = get_client(self.account_sid, self.auth_token)
+        sent = client.messages.create(to=to_number, from_=self.from_number, body=message)
+        return sent.sid
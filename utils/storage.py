@@ -0,0 +1,150 @@
+"""
+Content-addressed file storage for uploaded documents.
+
+Each file is stored under the SHA-256 hash of its contents
+(<upload_to>/ab/cd/abcd...ef.pdf). Uploading the same certificate twice
+therefore keeps a single copy on disk. The hash is computed while reading
+the upload in chunks, and the file is written in chunks as well, so
+memory use does not depend on the document size. Uploads over
+settings.FILE_UPLOAD_MAX_SIZE are skipped while they are still being
+received (see utils/uploads.py).
+
+Blobs can be shared by several records, so deleting a record never
+deletes its file.
+
+The content type recorded for a document, and the extension it is stored
+under, come from the file's leading bytes (sniff_content_type) rather than
+from the name the client sent.
+"""
+import hashlib
+import mimetypes
+import posixpath
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.template.defaultfilters import filesizeformat
+from django.utils.deconstruct import deconstructible
+
+from utils.uploads import OversizedUploadedFile, file_upload_max_size
+
+DEFAULT_DOCUMENT_MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # bytes
+
+# Leading bytes of the document formats members upload, and their types.
+CONTENT_SIGNATURES = (
+    (b'%PDF-', 'application/pdf'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+)
+# Containers shared by several formats: the name's extension picks the
+# format, but only from those that really use the container.
+CONTAINER_SIGNATURES = (
+    (b'PK\x03\x04', 'application/zip', {'.docx', '.xlsx', '.pptx', '.odt', '.ods'}),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/x-ole-storage', {'.doc', '.xls', '.ppt'}),
+)
+UNKNOWN_CONTENT_TYPE = 'application/octet-stream'
+
+
+def sniff_content_type(content, name=''):
+    """
+    Returns the content type of a file from its leading bytes. `name` only
+    tells apart formats that share a container, such as .docx and .xlsx.
+    """
+    position = content.tell() if hasattr(content, 'tell') else None
+    content.seek(0)
+    head = content.read(16)
+    if position is not None:
+        content.seek(position)
+    if isinstance(head, str):
+        head = head.encode()
+
+    for signature, content_type in CONTENT_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'image/webp'
+    extension = posixpath.splitext(name)[1].lower()
+    for signature, content_type, extensions in CONTAINER_SIGNATURES:
+        if head.startswith(signature):
+            return mimetypes.guess_type(name)[0] if extension in extensions else content_type
+    return UNKNOWN_CONTENT_TYPE
+
+
+def content_extension(content_type, name=''):
+    """The extension to store a file of `content_type` under, keeping the client's when it agrees."""
+    extension = posixpath.splitext(name)[1].lower()
+    if extension and mimetypes.guess_type(f'file{extension}')[0] == content_type:
+        return extension
+    if content_type == UNKNOWN_CONTENT_TYPE:
+        return ''
+    return mimetypes.guess_extension(content_type) or ''
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    def hashed_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        hexdigest = digest.hexdigest()
+        directory = posixpath.dirname(name)
+        extension = content_extension(sniff_content_type(content, name), name)
+        return posixpath.join(directory, hexdigest[:2], hexdigest[2:4], hexdigest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            from django.core.files import File
+            content = File(content, name)
+
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Same bytes already stored: reuse the existing blob.
+            return name
+        return self._save(name, content)
+
+    def delete(self, name):
+        # Blobs may be referenced by other records; keep them.
+        pass
+
+
+def document_storage():
+    return HashedFileSystemStorage()
+
+
+def document_max_upload_size():
+    return getattr(settings, 'DOCUMENT_MAX_UPLOAD_SIZE', DEFAULT_DOCUMENT_MAX_UPLOAD_SIZE)
+
+
+@deconstructible
+class MaxFileSizeValidator:
+    """
+    Rejects uploads larger than settings.DOCUMENT_MAX_UPLOAD_SIZE, or than
+    `limit` bytes when given, and any upload skipped at the
+    settings.FILE_UPLOAD_MAX_SIZE cap while it was being received.
+    """
+    def __init__(self, limit=None):
+        self.limit = limit
+
+    def __call__(self, value):
+        if getattr(value, '_committed', False):
+            return  # Already stored; only new uploads are checked.
+        limit = self.limit or document_max_upload_size()
+        # Forms validate the uploaded file itself, models a FieldFile wrapping it.
+        uploaded = getattr(value, 'file', value) if not isinstance(value, OversizedUploadedFile) else value
+        if isinstance(uploaded, OversizedUploadedFile):
+            limit = min(limit, file_upload_max_size())
+        if value.size is not None and value.size > limit:
+            raise ValidationError(
+                'The file is too large (%(size)s). The maximum allowed size is %(limit)s.',
+                code='file_too_large',
+                params={'size': filesizeformat(value.size), 'limit': filesizeformat(limit)},
+            )
+
+    def __eq__(self, other):
+        return isinstance(other, MaxFileSizeValidator) and self.limit == other.limit
@@ -0,0 +1,79 @@
+"""
+Upload size limits enforced while the request body is being parsed.
+
+Model and form validators only see a file after Django has read all of it
+into memory or a temporary file. MaxUploadSizeHandler, listed first in
+FILE_UPLOAD_HANDLERS, counts each file's bytes as they arrive instead. Once
+a file passes settings.FILE_UPLOAD_MAX_SIZE it raises SkipFile: the partial
+temporary file is removed and the rest of that file is read and thrown away
+rather than stored. The connection stays open and the other form fields
+are still parsed, so the browser gets the form back with the size error.
+
+The cap applies to every file upload on the site, including profile
+pictures and dues import CSVs. Forms can enforce a lower limit of their own
+with MaxFileSizeValidator (see utils/storage.py).
+
+Skipping the file drops it from request.FILES, which a form would take for
+"no file chosen". OversizedUploadMiddleware puts an empty
+OversizedUploadedFile back in its place, and MaxFileSizeValidator rejects it
+with the usual size error.
+"""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+DEFAULT_FILE_UPLOAD_MAX_SIZE = 10 * 1024 * 1024  # bytes
+
+
+def file_upload_max_size():
+    return getattr(settings, 'FILE_UPLOAD_MAX_SIZE', DEFAULT_FILE_UPLOAD_MAX_SIZE)
+
+
+class OversizedUploadedFile(UploadedFile):
+    """
+    Stands in for an upload that was skipped for going over
+    settings.FILE_UPLOAD_MAX_SIZE. It has no content; `size` is the number
+    of bytes received before the file was skipped.
+    """
+    def __init__(self, name, content_type, size, charset=None):
+        super().__init__(BytesIO(), name, content_type, size, charset)
+
+
+class MaxUploadSizeHandler(FileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > file_upload_max_size():
+            placeholder = OversizedUploadedFile(self.file_name, self.content_type, self.received, self.charset)
+            if not hasattr(self.request, 'oversized_uploads'):
+                self.request.oversized_uploads = []
+            self.request.oversized_uploads.append((self.field_name, placeholder))
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class OversizedUploadMiddleware:
+    """
+    Adds the files skipped by MaxUploadSizeHandler to request.FILES as
+    OversizedUploadedFile placeholders, so form validation reports them.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method == 'POST' and request.content_type == 'multipart/form-data':
+            files = request.FILES  # Parses the body, unless CsrfViewMiddleware already has.
+            for field_name, placeholder in getattr(request, 'oversized_uploads', ()):
+                files.appendlist(field_name, placeholder)
+        return None